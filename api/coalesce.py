@@ -0,0 +1,98 @@
+"""
+Single-flight request coalescing: identical reads that arrive while one is already running wait for its result
+instead of running again, so a hot key never has more than one query (and connection) in flight.
+
+Results are shared between every waiting request, so they must be treated as read-only.
+
+Reads that do run can be bounded with an `InFlightLimit`, so that past it requests wait on the event loop
+(and are turned away after a timeout) instead of in the threadpool's unbounded queue.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .instrumentation import COALESCED_REQUESTS, REQUESTS_REJECTED
+
+
+def _freeze(value: Any) -> Hashable:
+    """Makes argument values usable in a key, e.g. lists of CRNs."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class InFlightLimit:
+    """
+    Admits at most `limit` calls at once, e.g. as many as there are database connections. Others wait for
+    a slot for up to `timeout` seconds (forever if None) and then get a 503.
+    """
+
+    def __init__(self, limit: int, timeout: Optional[float] = None):
+        self.limit = limit
+        self.timeout = timeout
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self.semaphore is None:
+            # Created on first use so it belongs to the server's event loop
+            self.semaphore = asyncio.Semaphore(self.limit)
+
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            REQUESTS_REJECTED.labels("overloaded").inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+
+class SingleFlight:
+    def __init__(self, limit: Optional[InFlightLimit] = None):
+        self.calls: Dict[Hashable, asyncio.Future] = {}
+        self.limit = limit
+
+    def key(self, name: str, args: Tuple, kwargs: Dict[str, Any]) -> Hashable:
+        return (name, _freeze(args), tuple(sorted((arg, _freeze(value)) for arg, value in kwargs.items())))
+
+    async def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)` in the threadpool, or waits for the result of the identical call already running.
+        `name` identifies the operation in the key and metrics.
+        The call itself keeps running if the request that started it is cancelled, for the others waiting on it.
+        """
+        key = self.key(name, args, kwargs)
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(self._call(fn, *args, **kwargs))
+            self.calls[key] = call
+            call.add_done_callback(lambda _: self._finish(key, call))
+        else:
+            COALESCED_REQUESTS.labels(name).inc()
+
+        return await asyncio.shield(call)
+
+    async def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        if self.limit is None:
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+        async with self.limit.slot():
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+    def _finish(self, key: Hashable, call: asyncio.Future):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+        # Retrieve the exception so it isn't logged as unhandled if every waiting request was cancelled
+        if not call.cancelled():
+            call.exception()
+
@@ -1,9 +1,17 @@
-from typing import Any, List, Dict, Optional, Iterator
+from typing import Any, Callable, Iterable, List, Dict, Optional, Iterator, Tuple, TypeVar
+from contextlib import contextmanager
+import threading
+import time
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
+import psycopg2.errors
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import RealDictCursor, RealDictConnection
+from psycopg2 import sql
 from pypika.enums import Order
-from .models import Course, CourseSection, CourseSectionPeriod, Semester
+from .models import CatalogCourse, Course, CourseSection, CourseSectionPeriod, FacetValue, Facets, RoomBooking, Semester
+from .parser.utils import minutes_to_time
+from .section_index import get_semester_index
+from .instrumentation import DB_READS, POOL_WAIT, import_stage, observe_query
 
 from pypika import PostgreSQLQuery as Query, Table, Field
 from pypika.queries import QueryBuilder
@@ -13,6 +21,8 @@ from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
+T = TypeVar("T")
+
 course_sections_t = Table("course_sections")
 course_sections_q: QueryBuilder = (
     Query.from_(course_sections_t)
@@ -23,50 +33,259 @@ course_sections_q: QueryBuilder = (
 periods_t = Table("course_section_periods")
 periods_q: QueryBuilder = Query.from_(periods_t).select("*")
 
+PARTITIONED_TABLES = ["course_sections", "course_section_periods"]
+"""Tables partitioned by semester_id, one partition per semester named `<table>_<semester_id>`."""
+
+course_summaries_t = Table("course_summaries")
+course_summaries_q: QueryBuilder = (
+    Query.from_(course_summaries_t)
+    .orderby(course_summaries_t.subject_prefix)
+    .orderby(course_summaries_t.number)
+    .orderby(course_summaries_t.title)
+)
+
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that records the timing and row count of every query it executes."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            observe_query(query if isinstance(query, str) else query.as_string(self),
+                          time.perf_counter() - start, max(self.rowcount, 0))
+
+
+class PoolSaturatedError(Exception):
+    """Raised when no database connection frees up in time, so the request is shed instead of queueing."""
+
+
+class BoundedConnectionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool that waits up to a timeout for a connection to free up instead of failing right away."""
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None, timeout: Optional[float] = None):
+        if not self.slots.acquire(timeout=timeout):
+            raise PoolSaturatedError(
+                "Timed out waiting for a database connection")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self.slots.release()
+
 
 class PostgresPoolWrapper:
-    def __init__(self, postgres_dsn: str, min_connections: int = int(os.environ["MIN_DB_CONNECTIONS"]), max_connections: int = int(os.environ["MAX_DB_CONNECTIONS"])):
-        self.postgres_pool: Optional[SimpleConnectionPool] = None
+    def __init__(
+        self,
+        postgres_dsn: str,
+        min_connections: int = int(os.environ["MIN_DB_CONNECTIONS"]),
+        max_connections: int = int(os.environ["MAX_DB_CONNECTIONS"]),
+        read_dsns: Optional[List[str]] = None,
+        read_strategy: str = "round_robin",
+        version_ttl: float = 5,
+        pool_timeout: Optional[float] = None,
+    ):
+        """
+        `postgres_dsn` is the primary, which all writes (imports) go to. Reads can be spread over replicas with
+        `read_dsns`, picking one per request by `read_strategy`: `round_robin` or `least_busy` (fewest connections
+        in use). Replicas that haven't replayed a semester's latest import yet are skipped for it, checked at most
+        every `version_ttl` seconds, so reads never go back in time by more than that.
+
+        Requests wait at most `pool_timeout` seconds (forever if None) for a connection before `PoolSaturatedError`.
+        """
+        if read_strategy not in ("round_robin", "least_busy"):
+            raise ValueError(f"Unknown read strategy {read_strategy!r}")
+
+        self.postgres_pool: Optional[BoundedConnectionPool] = None
         self.postgres_dsn = postgres_dsn
         self.min_connections = min_connections
         self.max_connections = max_connections
 
+        self.read_dsns = read_dsns or []
+        self.read_strategy = read_strategy
+        self.version_ttl = version_ttl
+        self.pool_timeout = pool_timeout
+        self.read_pools: List[BoundedConnectionPool] = []
+        self.read_in_use: List[int] = []
+        self.next_read = 0
+        # Latest import_id of each semester per database (None is the primary), and when it was fetched
+        self.import_versions: Dict[Optional[int], Tuple[float, Dict[str, int]]] = {}
+        self.lock = threading.Lock()
+
+    def _create_pool(self, dsn: str) -> BoundedConnectionPool:
+        return BoundedConnectionPool(
+            self.min_connections,
+            self.max_connections,
+            dsn,
+            cursor_factory=InstrumentedCursor
+        )
+
     def init(self):
         """ Connects to the database and initializes connection pool """
         if self.postgres_pool is not None:
             return
 
         try:
-            self.postgres_pool = SimpleConnectionPool(
-                self.min_connections,
-                self.max_connections,
-                self.postgres_dsn,
-                cursor_factory=RealDictCursor
-            )
+            self.postgres_pool = self._create_pool(self.postgres_dsn)
 
             if self.postgres_pool is None:
                 raise Exception("Unknown error")
 
         except (Exception, psycopg2.DatabaseError) as e:
             print(f"Failed to create Postgres connection pool: {e}")
+            return
+
+        for dsn in self.read_dsns:
+            try:
+                self.read_pools.append(self._create_pool(dsn))
+                self.read_in_use.append(0)
+            except (Exception, psycopg2.DatabaseError) as e:
+                print(f"Failed to create Postgres read replica connection pool: {e}")
+
+    def _getconn(self, pool: BoundedConnectionPool) -> RealDictConnection:
+        with POOL_WAIT.time():
+            conn: RealDictConnection = pool.getconn(
+                timeout=self.pool_timeout)
+
+        if conn is None:
+            raise Exception(
+                "Failed to get connection from Postgres connection pool")
+        return conn
 
     def get_conn(self) -> Iterator[RealDictConnection]:
         """ Yields a connection from the connection pool and returns the connection to the pool
-            after the yield completes
+            after the yield completes. Use `connection` outside of FastAPI dependencies.
+        """
+        with self.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def connection(self) -> Iterator[RealDictConnection]:
+        """ Holds a connection from the primary's pool for the `with` block, e.g. for scripts:
+            `with postgres_pool.connection() as conn:`
         """
         if self.postgres_pool is None:
             raise Exception(
                 "Cannot get db connection before connecting to database")
 
-        conn: RealDictConnection = self.postgres_pool.getconn()
+        conn = self._getconn(self.postgres_pool)
+        try:
+            yield conn
+        finally:
+            self.postgres_pool.putconn(conn)
 
-        if conn is None:
+    def call_read(self, fn: Callable[..., T], semester_id: Optional[str] = None, *args, **kwargs) -> T:
+        """ Calls `fn(conn, semester_id, *args, **kwargs)` with a read connection for the semester,
+            or `fn(conn, *args, **kwargs)` without a semester
+        """
+        with self.read_conn(semester_id) as conn:
+            if semester_id is None:
+                return fn(conn, *args, **kwargs)
+            return fn(conn, semester_id, *args, **kwargs)
+
+    @contextmanager
+    def read_conn(self, semester_id: Optional[str]) -> Iterator[RealDictConnection]:
+        """ Yields a connection for read-only queries, from a read replica that is up to date with
+            the semester's latest import if there is one, otherwise from the primary
+        """
+        if self.postgres_pool is None:
             raise Exception(
-                "Failed to get connection from Postgres connection pool")
+                "Cannot get db connection before connecting to database")
+
+        replica = self._choose_replica(semester_id)
+        if replica is None:
+            DB_READS.labels("primary").inc()
+            with self.connection() as conn:
+                yield conn
+            return
+
+        DB_READS.labels(f"replica{replica}").inc()
+        pool = self.read_pools[replica]
+        try:
+            conn = self._getconn(pool)
+            try:
+                yield conn
+            finally:
+                pool.putconn(conn)
+        finally:
+            with self.lock:
+                self.read_in_use[replica] -= 1
+
+    def _choose_replica(self, semester_id: Optional[str]) -> Optional[int]:
+        """Picks the replica to read from (reserving it), or None to read from the primary."""
+        if not self.read_pools:
+            return None
+
+        if semester_id is None:
+            required_version = 0
+        else:
+            required_version = self._import_versions(None).get(semester_id, 0)
+
+        candidates = [
+            replica for replica in range(len(self.read_pools))
+            if semester_id is None or self._import_versions(replica).get(semester_id, 0) >= required_version
+        ]
+        if not candidates:
+            return None
+
+        with self.lock:
+            # Rotate the starting point so ties (and round robin) spread across replicas
+            start = self.next_read
+            self.next_read += 1
+            candidates.sort(
+                key=lambda replica: (replica - start) % len(self.read_pools))
+            if self.read_strategy == "least_busy":
+                candidates.sort(key=lambda replica: self.read_in_use[replica])
+
+            replica = candidates[0]
+            self.read_in_use[replica] += 1
+            return replica
+
+    def _import_versions(self, replica: Optional[int]) -> Dict[str, int]:
+        """
+        The latest import_id of each semester as seen by the primary (None) or a replica, cached for `version_ttl`.
+        Unreachable replicas see nothing, so they are skipped until they come back.
+        """
+        now = time.monotonic()
+        cached = self.import_versions.get(replica)
+        if cached is not None and now - cached[0] < self.version_ttl:
+            return cached[1]
 
-        yield conn
+        pool = self.postgres_pool if replica is None else self.read_pools[replica]
+        versions: Dict[str, int] = {}
+        try:
+            conn = self._getconn(pool)
+            try:
+                c = conn.cursor()
+                c.execute(
+                    "SELECT semester_id, MAX(import_id) AS import_id FROM semester_imports GROUP BY semester_id")
+                versions = {record["semester_id"]: record["import_id"]
+                            for record in c.fetchall()}
+                conn.rollback()
+            finally:
+                pool.putconn(conn)
+        except (Exception, psycopg2.DatabaseError) as e:
+            if replica is None:
+                raise
+            if isinstance(e, PoolSaturatedError):
+                # The replica is just busy, skip it for this request only
+                return cached[1] if cached is not None else {}
+            print(f"Failed to check read replica {replica}: {e}")
+            versions = {}
 
-        self.postgres_pool.putconn(conn)
+        self.import_versions[replica] = (now, versions)
+        return versions
 
     def cleanup(self):
         """ Closes all connections in the connection pool """
@@ -74,9 +293,17 @@ class PostgresPoolWrapper:
             return
 
         self.postgres_pool.closeall()
+        for pool in self.read_pools:
+            pool.closeall()
 
 
-postgres_pool = PostgresPoolWrapper(postgres_dsn=os.environ["POSTGRES_DSN"])
+postgres_pool = PostgresPoolWrapper(
+    postgres_dsn=os.environ["POSTGRES_DSN"],
+    read_dsns=[dsn.strip() for dsn in os.environ.get("POSTGRES_READ_DSNS", "").split(",") if dsn.strip()],
+    read_strategy=os.environ.get("POSTGRES_READ_STRATEGY", "round_robin"),
+    version_ttl=float(os.environ.get("REPLICA_VERSION_TTL", 5)),
+    pool_timeout=float(os.environ.get("POOL_TIMEOUT_MS", 2000)) / 1000,
+)
 
 
 def fetch_semesters(conn: RealDictConnection) -> List[Semester]:
@@ -86,42 +313,384 @@ def fetch_semesters(conn: RealDictConnection) -> List[Semester]:
     return list(map(Semester.from_record, records))
 
 
-def update_course_sections(conn: RealDictConnection, semester_id: str, course_sections: List[CourseSection]):
+class ImportValidationError(Exception):
+    """Raised when a staged import looks wrong and is rolled back instead of replacing the live data."""
+
+
+MIN_IMPORT_RATIO = float(os.environ.get("MIN_IMPORT_RATIO", 0.5))
+"""Reject imports with fewer sections than this fraction of the previous import's."""
+
+IMPORT_HISTORY = int(os.environ.get("IMPORT_HISTORY", 48))
+"""The number of past imports kept in `semester_imports` per semester."""
+
+
+def update_course_sections(
+    conn: RealDictConnection, semester_id: str, course_sections: Iterable[CourseSection], batch_size: int = 500
+):
+    """
+    Replaces a semester's course sections and periods with new ones.
+
+    `course_sections` can be a generator: sections are consumed and written in batches of `batch_size`
+    so memory stays bounded regardless of semester size.
+
+    The new rows are first loaded into staging tables (with the same indexes as the partitions) that readers
+    can't see, then validated against the previous import, and the derived tables are rebuilt from them.
+    Finally the staging tables replace the semester's partitions right before the commit.
+    The old partitions are dropped whole, so no dead rows are left behind.
+    Any failure rolls everything back and leaves the live data untouched.
+    """
     c = conn.cursor()
 
-    c.execute(
-        "DELETE FROM course_section_periods WHERE semester_id=%s", (semester_id,))
-    c.execute("DELETE FROM course_sections WHERE semester_id=%s", (semester_id,))
+    try:
+        create_staging_tables(c, semester_id)
 
-    print(f"Adding {len(course_sections)} sections...", flush=True)
-    for course_section in course_sections:
-        record = course_section.to_record()
+        print("Staging sections...", flush=True)
+        for batch in _batched(course_sections, batch_size):
+            with import_stage("load"):
+                stage_course_sections(c, semester_id, batch)
+
+        section_count, period_count = validate_staged_import(c, semester_id)
+
+        print(
+            f"Swapping in {section_count} sections with {period_count} periods...", flush=True)
+        with import_stage("load"):
+            # Derive everything from the staged tables first so the parent tables are only locked for the swap
+            sections_table = staging_name("course_sections", semester_id)
+            periods_table = staging_name("course_section_periods", semester_id)
+            refresh_course_summaries(c, semester_id, sections_table, periods_table)
+            refresh_catalog_courses(c, semester_id)
+            refresh_semester_facets(c, semester_id, sections_table, periods_table)
+            refresh_instructor_sections(c, semester_id, periods_table)
+            refresh_room_bookings(c, semester_id, periods_table)
+            record_import(c, semester_id, section_count, period_count)
+
+            # Must be last: detaching locks every semester's sections until the commit
+            swap_semester_partitions(c, semester_id)
 
-        # Add new record
-        q = Query \
-            .into(course_sections_t) \
-            .columns(*record.keys()) \
-            .insert(*record.values())
-        c.execute(str(q))
-
-        # Add course sections
-        if len(course_section.periods) > 0:
-            q = Query \
-                .into(periods_t) \
-                .columns(*course_section.periods[0].dict().keys())
-
-            for period in course_section.periods:
-                q = q.insert(*period.to_record().values())
-
-            c.execute(str(q))
-    if len(course_sections) > 0:
         conn.commit()
         print("Done!", flush=True)
-    else:
-        print("No course sections found... rolling back any changes")
+    except Exception:
+        print("Import failed... rolling back any changes", flush=True)
+        conn.rollback()
+        raise
+
+
+def partition_name(table: str, semester_id: str) -> str:
+    """The name of a table's partition for a semester, e.g. `course_sections_202101`."""
+    if not semester_id.isalnum():
+        raise ValueError(f"Invalid semester id {semester_id!r}")
+    return f"{table}_{semester_id}"
+
+
+def staging_name(table: str, semester_id: str) -> str:
+    """The name of the table a semester's partition of `table` is staged in during an import."""
+    return partition_name(table, semester_id) + "_staging"
+
+
+def create_staging_tables(cursor: RealDictCursor, semester_id: str):
+    """
+    Creates empty tables shaped exactly like the semester's future partitions, indexes included, so they can
+    be attached without rebuilding anything. The CHECK constraint lets Postgres skip validating every row on attach.
+    """
+    for table in PARTITIONED_TABLES:
+        staging = sql.Identifier(staging_name(table, semester_id))
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(staging))
+        cursor.execute(
+            sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES)").format(
+                staging, sql.Identifier(table))
+        )
+        cursor.execute(
+            sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} CHECK (semester_id = {})").format(
+                staging, sql.Identifier(staging_name(table, semester_id) + "_semester_check"), sql.Literal(semester_id))
+        )
+
+
+SWAP_LOCK_TIMEOUT_MS = int(os.environ.get("SWAP_LOCK_TIMEOUT_MS", 200))
+"""How long the swap waits for reads of the partitioned tables to finish, while new reads queue up behind it."""
+
+SWAP_ATTEMPTS = int(os.environ.get("SWAP_ATTEMPTS", 20))
+
+
+def swap_semester_partitions(cursor: RealDictCursor, semester_id: str):
+    """
+    Replaces the semester's partitions with the staged tables and drops the old ones.
+
+    Detaching needs an exclusive lock on the parent tables, which every read waits behind once it is requested.
+    So only wait for it briefly and retry later if running reads don't finish by then,
+    instead of stalling all reads until they do.
+    """
+    cursor.execute("SET LOCAL lock_timeout = %s", (f"{SWAP_LOCK_TIMEOUT_MS}ms",))
+
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        cursor.execute("SAVEPOINT swap")
+        try:
+            _swap_semester_partitions(cursor, semester_id)
+        except psycopg2.errors.LockNotAvailable:
+            cursor.execute("ROLLBACK TO SAVEPOINT swap")
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            print(
+                f"Timed out waiting for reads to finish, retrying swap ({attempt}/{SWAP_ATTEMPTS})...", flush=True)
+            time.sleep(min(0.1 * 2 ** attempt, 5))
+        else:
+            cursor.execute("RELEASE SAVEPOINT swap")
+            return
+
+
+def _swap_semester_partitions(cursor: RealDictCursor, semester_id: str):
+    for table in PARTITIONED_TABLES:
+        partition = partition_name(table, semester_id)
+        staging = staging_name(table, semester_id)
+
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS exists", (partition,))
+        if cursor.fetchone()["exists"]:
+            cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                sql.Identifier(table), sql.Identifier(partition)))
+            cursor.execute(sql.SQL("DROP TABLE {}").format(
+                sql.Identifier(partition)))
+
+        cursor.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+            sql.Identifier(staging), sql.Identifier(partition)))
+        cursor.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})").format(
+            sql.Identifier(table), sql.Identifier(partition), sql.Literal(semester_id)))
+        cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+            sql.Identifier(partition), sql.Identifier(staging + "_semester_check")))
+
+
+def _batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Splits an iterable into lists of `size` items (the last one may be shorter)."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stage_course_sections(cursor: RealDictCursor, semester_id: str, course_sections: List[CourseSection]):
+    """Inserts a batch of course sections and all their periods into the staging tables with one query each."""
+    if len(course_sections) == 0:
+        return
+
+    # Add new records
+    q = Query \
+        .into(Table(staging_name("course_sections", semester_id))) \
+        .columns(*course_sections[0].to_record().keys())
+    for course_section in course_sections:
+        q = q.insert(*course_section.to_record().values())
+    cursor.execute(str(q))
+
+    # Add course section periods
+    periods = [
+        period for course_section in course_sections for period in course_section.periods]
+    if len(periods) > 0:
+        q = Query \
+            .into(Table(staging_name("course_section_periods", semester_id))) \
+            .columns(*periods[0].dict().keys())
+        for period in periods:
+            q = q.insert(*period.to_record().values())
+        cursor.execute(str(q))
+
+
+def validate_staged_import(cursor: RealDictCursor, semester_id: str) -> Tuple[int, int]:
+    """
+    Checks the staged sections against the previous import of the semester and returns the staged
+    section and period counts. Raises `ImportValidationError` if nothing was staged or far fewer
+    sections were staged than last time, which almost always means the scrape broke.
+    """
+    cursor.execute(sql.SQL("SELECT COUNT(*) AS count FROM {}").format(
+        sql.Identifier(staging_name("course_sections", semester_id))))
+    section_count = cursor.fetchone()["count"]
+    cursor.execute(sql.SQL("SELECT COUNT(*) AS count FROM {}").format(
+        sql.Identifier(staging_name("course_section_periods", semester_id))))
+    period_count = cursor.fetchone()["count"]
+
+    if section_count == 0:
+        raise ImportValidationError(
+            f"No course sections found for {semester_id}")
+
+    cursor.execute(
+        "SELECT section_count FROM semester_imports WHERE semester_id=%s ORDER BY import_id DESC LIMIT 1",
+        (semester_id,),
+    )
+    previous_import = cursor.fetchone()
+    if previous_import is not None and section_count < previous_import["section_count"] * MIN_IMPORT_RATIO:
+        raise ImportValidationError(
+            f"Only {section_count} sections found for {semester_id}, previous import had {previous_import['section_count']}")
+
+    return section_count, period_count
+
+
+def record_import(cursor: RealDictCursor, semester_id: str, section_count: int, period_count: int) -> int:
+    """Records a successful import of a semester, forgets the oldest ones and returns the new import id."""
+    cursor.execute(
+        "INSERT INTO semester_imports (semester_id, section_count, period_count) VALUES (%s, %s, %s) RETURNING import_id",
+        (semester_id, section_count, period_count),
+    )
+    import_id = cursor.fetchone()["import_id"]
+    cursor.execute(
+        """
+        DELETE FROM semester_imports WHERE semester_id=%s AND import_id NOT IN (
+            SELECT import_id FROM semester_imports WHERE semester_id=%s ORDER BY import_id DESC LIMIT %s
+        )
+        """,
+        (semester_id, semester_id, IMPORT_HISTORY),
+    )
+    return import_id
 
 
-def fetch_course_sections(conn: RealDictConnection, semester_id: str, crns: List[str]) -> CourseSection:
+def refresh_course_summaries(
+    cursor: RealDictCursor, semester_id: str,
+    sections_table: str = "course_sections", periods_table: str = "course_section_periods"
+):
+    """
+    Rebuilds the semester's rows in `course_summaries` from its sections (in the given tables, e.g. staging ones).
+    Runs in the import's transaction so readers see either the old or the new summaries, never a mix.
+    """
+    cursor.execute(
+        "DELETE FROM course_summaries WHERE semester_id=%s", (semester_id,))
+    cursor.execute(
+        sql.SQL("""
+        WITH sections AS (
+            SELECT s.*,
+                (SELECT MIN(c) FROM UNNEST(s.credits) AS c) AS min_credits,
+                (SELECT MAX(c) FROM UNNEST(s.credits) AS c) AS max_credits
+            FROM {sections} s
+            WHERE s.semester_id = %(semester_id)s
+        ), course_period_types AS (
+            SELECT s.course_subject_prefix, s.course_number, s.course_title,
+                ARRAY_AGG(DISTINCT p.type::TEXT ORDER BY p.type::TEXT) AS period_types
+            FROM {sections} s
+            JOIN {periods} p ON p.semester_id = s.semester_id AND p.crn = s.crn
+            WHERE s.semester_id = %(semester_id)s AND p.type IS NOT NULL
+            GROUP BY s.course_subject_prefix, s.course_number, s.course_title
+        )
+        INSERT INTO course_summaries (
+            semester_id, subject_prefix, number, title, section_count,
+            total_seats, open_seats, min_credits, max_credits, period_types
+        )
+        SELECT s.semester_id, s.course_subject_prefix, s.course_number, s.course_title, COUNT(*),
+            SUM(s.max_enrollments), SUM(GREATEST(s.max_enrollments - s.enrollments, 0)),
+            MIN(s.min_credits), MAX(s.max_credits), COALESCE(t.period_types, '{{}}')
+        FROM sections s
+        LEFT JOIN course_period_types t USING (course_subject_prefix, course_number, course_title)
+        GROUP BY s.semester_id, s.course_subject_prefix, s.course_number, s.course_title, t.period_types
+        """).format(sections=sql.Identifier(sections_table), periods=sql.Identifier(periods_table)),
+        {"semester_id": semester_id},
+    )
+
+
+def refresh_catalog_courses(cursor: RealDictCursor, semester_id: str):
+    """
+    Links the semester to the `catalog_courses` of its course summaries, creating any new ones. Titles and credits
+    come from the sections until the course has been scraped from the catalog, which is trusted after that.
+    """
+    cursor.execute(
+        "UPDATE catalog_courses SET semester_ids = ARRAY_REMOVE(semester_ids, %(semester_id)s) "
+        "WHERE %(semester_id)s = ANY(semester_ids)",
+        {"semester_id": semester_id},
+    )
+    cursor.execute(
+        """
+        INSERT INTO catalog_courses (subject_prefix, number, title, min_credits, max_credits, semester_ids)
+        SELECT subject_prefix, number, MIN(title), MIN(min_credits), MAX(max_credits), ARRAY[%(semester_id)s]
+        FROM course_summaries
+        WHERE semester_id = %(semester_id)s
+        GROUP BY subject_prefix, number
+        ON CONFLICT (subject_prefix, number) DO UPDATE SET
+            semester_ids = ARRAY(
+                SELECT DISTINCT UNNEST(catalog_courses.semester_ids || EXCLUDED.semester_ids) ORDER BY 1
+            ),
+            title = CASE WHEN catalog_courses.content_hash IS NULL
+                THEN EXCLUDED.title ELSE catalog_courses.title END,
+            min_credits = CASE WHEN catalog_courses.content_hash IS NULL
+                THEN EXCLUDED.min_credits ELSE catalog_courses.min_credits END,
+            max_credits = CASE WHEN catalog_courses.content_hash IS NULL
+                THEN EXCLUDED.max_credits ELSE catalog_courses.max_credits END
+        """,
+        {"semester_id": semester_id},
+    )
+
+
+def refresh_semester_facets(
+    cursor: RealDictCursor, semester_id: str,
+    sections_table: str = "course_sections", periods_table: str = "course_section_periods"
+):
+    """
+    Rebuilds the semester's rows in `semester_facets`: every subject prefix, instructor, period type,
+    instruction method, credit value and location with the number of sections that have it.
+    """
+    cursor.execute(
+        "DELETE FROM semester_facets WHERE semester_id=%s", (semester_id,))
+    cursor.execute(
+        sql.SQL("""
+        INSERT INTO semester_facets (semester_id, facet, value, count)
+        SELECT %(semester_id)s, 'subject_prefixes', course_subject_prefix, COUNT(*)
+        FROM {sections} WHERE semester_id = %(semester_id)s
+        GROUP BY course_subject_prefix
+        UNION ALL
+        SELECT %(semester_id)s, 'instruction_methods', instruction_method, COUNT(*)
+        FROM {sections} WHERE semester_id = %(semester_id)s AND instruction_method IS NOT NULL
+        GROUP BY instruction_method
+        UNION ALL
+        SELECT %(semester_id)s, 'credits', c::TEXT, COUNT(*)
+        FROM {sections}, UNNEST(credits) AS c WHERE semester_id = %(semester_id)s
+        GROUP BY c
+        UNION ALL
+        SELECT %(semester_id)s, 'period_types', type::TEXT, COUNT(DISTINCT crn)
+        FROM {periods} WHERE semester_id = %(semester_id)s AND type IS NOT NULL
+        GROUP BY type
+        UNION ALL
+        SELECT %(semester_id)s, 'instructors', i, COUNT(DISTINCT crn)
+        FROM {periods}, UNNEST(instructors) AS i WHERE semester_id = %(semester_id)s
+        GROUP BY i
+        UNION ALL
+        SELECT %(semester_id)s, 'locations', location, COUNT(DISTINCT crn)
+        FROM {periods} WHERE semester_id = %(semester_id)s AND location IS NOT NULL
+        GROUP BY location
+        """).format(sections=sql.Identifier(sections_table), periods=sql.Identifier(periods_table)),
+        {"semester_id": semester_id},
+    )
+
+
+def refresh_instructor_sections(cursor: RealDictCursor, semester_id: str, periods_table: str = "course_section_periods"):
+    """Rebuilds the semester's index of instructor -> CRNs of the sections they teach."""
+    cursor.execute(
+        "DELETE FROM instructor_sections WHERE semester_id=%s", (semester_id,))
+    cursor.execute(
+        sql.SQL("""
+        INSERT INTO instructor_sections (semester_id, instructor, crn)
+        SELECT DISTINCT semester_id, i, crn
+        FROM {periods}, UNNEST(instructors) AS i
+        WHERE semester_id = %s
+        """).format(periods=sql.Identifier(periods_table)),
+        (semester_id,),
+    )
+
+
+def refresh_room_bookings(cursor: RealDictCursor, semester_id: str, periods_table: str = "course_section_periods"):
+    """Rebuilds the semester's room bookings: one row per period per day it meets in a known location."""
+    cursor.execute(
+        "DELETE FROM room_bookings WHERE semester_id=%s", (semester_id,))
+    cursor.execute(
+        sql.SQL("""
+        INSERT INTO room_bookings (semester_id, location, day, start_minute, end_minute, minutes, crn)
+        SELECT semester_id, location, d, start_minute, end_minute, INT4RANGE(start_minute, end_minute), crn
+        FROM (
+            SELECT semester_id, location, days, crn,
+                SPLIT_PART(start_time, ':', 1)::INT * 60 + SPLIT_PART(start_time, ':', 2)::INT AS start_minute,
+                SPLIT_PART(end_time, ':', 1)::INT * 60 + SPLIT_PART(end_time, ':', 2)::INT AS end_minute
+            FROM {periods}
+            WHERE semester_id = %s AND location IS NOT NULL AND start_time IS NOT NULL AND end_time IS NOT NULL
+        ) AS periods, UNNEST(days) AS d
+        """).format(periods=sql.Identifier(periods_table)),
+        (semester_id,),
+    )
+
+
+def fetch_course_sections(conn: RealDictConnection, semester_id: str, crns: List[str], trusted: bool = False) -> List[CourseSection]:
     c = conn.cursor()
 
     # Create query to fetch course sections
@@ -144,58 +713,101 @@ def fetch_course_sections(conn: RealDictConnection, semester_id: str, crns: List
     period_records = c.fetchall()
 
     # Match the periods fetched to their course section records!
-    sections = []
-    for record in course_section_records:
-        # Find period records for this course section
-        section_period_records = filter(
-            lambda pr: pr["crn"] == record["crn"], period_records
-        )
-        # Turn those period records into CourseSectionPeriods
-        periods = list(
-            map(CourseSectionPeriod.from_record, section_period_records))
-        # Add created CourseSection
-        sections.append(CourseSection.from_record(record, periods))
-
-    return sections
-
-
-def search_course_sections(conn: RealDictConnection, semester_id: str, limit: int, offset: int, **search):
+    # Group them by CRN once instead of filtering every period for every section
+    periods_by_crn: Dict[str, List[CourseSectionPeriod]] = {}
+    for period_record in period_records:
+        periods_by_crn.setdefault(period_record["crn"], []).append(
+            CourseSectionPeriod.from_record(period_record, trusted))
+
+    return [
+        CourseSection.from_record(
+            record, periods_by_crn.get(record["crn"], []), trusted)
+        for record in course_section_records
+    ]
+
+
+def search_course_sections(conn: RealDictConnection, semester_id: str, limit: int, offset: int, trusted: bool = False, **search):
+    """
+    Searches the semester's sections. Sections can be filtered by exact subject prefix and number, partial title,
+    whether they have open seats, the days they meet on (only those days), the time window they meet in,
+    a number of credits they can be taken for and a type of period they have.
+
+    Searches are answered from the semester's in-memory index, see `api/section_index.py`.
+    """
+    index = get_semester_index(conn, semester_id)
+    if index is None:
+        return []
+    return index.search(limit, offset, trusted, **search)
+
+
+def search_instructor_sections(
+    conn: RealDictConnection, semester_id: str, name: str, limit: int, offset: int, trusted: bool = False
+) -> List[CourseSection]:
+    """Fetches the sections taught by instructors whose (last) name starts with `name`, case-insensitive."""
     c = conn.cursor()
 
-    q: QueryBuilder = (
-        course_sections_q.select("*")
-        .where(course_sections_t.semester_id == semester_id)
-        .limit(limit)
-        .offset(offset)
+    # Escape LIKE wildcards so the name is only ever matched as a prefix
+    prefix = name.lower().replace("\\", "\\\\").replace(
+        "%", "\\%").replace("_", "\\_")
+    c.execute(
+        """
+        SELECT DISTINCT crn FROM instructor_sections
+        WHERE semester_id=%s AND LOWER(instructor) LIKE %s
+        ORDER BY crn LIMIT %s OFFSET %s
+        """,
+        (semester_id, prefix + "%", limit, offset),
     )
+    crns = [record["crn"] for record in c.fetchall()]
 
-    # Values that require exact matches
-    for col in ["course_number", "course_subject_prefix"]:
-        if search[col]:
-            q = q.where(course_sections_t[col] == search[col])
+    if len(crns) == 0:
+        return []
 
-    # Values that require wildcards
-    for col in ["course_title"]:
-        if search[col]:
-            q = q.where(course_sections_t[col].ilike(f"%{search[col]}%"))
+    return fetch_course_sections(conn, semester_id, crns, trusted)
 
-    # Special values that require complex checks
-    if search["has_seats"] == False:
-        q = q.where(course_sections_t.enrollments >=
-                    course_sections_t.max_enrollments)
 
-    if search["has_seats"] == True:
-        q = q.where(course_sections_t.enrollments <
-                    course_sections_t.max_enrollments)
+def fetch_room_bookings(conn: RealDictConnection, semester_id: str, location: str) -> List[RoomBooking]:
+    """Fetches the weekly occupancy of a room, ordered by day and start time."""
+    c = conn.cursor()
+    c.execute(
+        """
+        SELECT day, start_minute, end_minute, crn FROM room_bookings
+        WHERE semester_id=%s AND location=%s
+        ORDER BY day, start_minute
+        """,
+        (semester_id, location),
+    )
+    return [
+        RoomBooking(
+            crn=record["crn"],
+            day=record["day"],
+            start_time=minutes_to_time(record["start_minute"]),
+            end_time=minutes_to_time(record["end_minute"]),
+        )
+        for record in c.fetchall()
+    ]
 
-    c.execute(q.get_sql())
-    records = c.fetchall()
 
-    return records_to_sections(conn, semester_id, records)
+def fetch_free_rooms(conn: RealDictConnection, semester_id: str, day: int, start_minute: int, end_minute: int) -> List[str]:
+    """Fetches the rooms with no bookings overlapping `start_minute`-`end_minute` on `day`."""
+    c = conn.cursor()
+    c.execute(
+        """
+        SELECT value FROM semester_facets
+        WHERE semester_id=%(semester_id)s AND facet='locations' AND value NOT IN (
+            SELECT location FROM room_bookings
+            WHERE semester_id=%(semester_id)s AND day=%(day)s
+                AND minutes && INT4RANGE(%(start_minute)s, %(end_minute)s)
+        )
+        ORDER BY value
+        """,
+        {"semester_id": semester_id, "day": day,
+            "start_minute": start_minute, "end_minute": end_minute},
+    )
+    return list(map(lambda record: record["value"], c.fetchall()))
 
 
 def fetch_course_section_periods(
-    conn: RealDictConnection, semester_id: str, crn: str
+    conn: RealDictConnection, semester_id: str, crn: str, trusted: bool = False
 ) -> List[CourseSectionPeriod]:
     c = conn.cursor()
     c.execute(
@@ -204,11 +816,11 @@ def fetch_course_section_periods(
     )
     course_section_periods_raw = c.fetchall()
 
-    return list(map(CourseSectionPeriod.from_record, course_section_periods_raw))
+    return [CourseSectionPeriod.from_record(record, trusted) for record in course_section_periods_raw]
 
 
 def populate_course_periods(
-    conn: RealDictConnection, semester_id: str, courses: List[Course], include_periods: bool
+    conn: RealDictConnection, semester_id: str, courses: List[Course], include_periods: bool, trusted: bool = False
 ):
     cursor = conn.cursor()
 
@@ -225,7 +837,8 @@ def populate_course_periods(
         cursor.execute(q.get_sql())
         records = cursor.fetchall()
         # TODO: check include_periods
-        course.sections = list(map(CourseSection.from_record, records))
+        course.sections = [CourseSection.from_record(
+            record, trusted=trusted) for record in records]
 
 
 def fetch_courses_without_sections(
@@ -233,42 +846,120 @@ def fetch_courses_without_sections(
 ) -> List[Course]:
     c = conn.cursor()
 
+    # Read from the course summaries precomputed at import instead of grouping all the semester's sections
     q: QueryBuilder = (
-        course_sections_q.select(course_sections_t.semester_id)
-        .select(course_sections_t.course_subject_prefix.as_("subject_prefix"))
-        .select(course_sections_t.course_number.as_("number"))
-        .select(course_sections_t.course_title.as_("title"))
-        .where(course_sections_t.semester_id == semester_id)
-        .groupby(course_sections_t.semester_id)
-        .groupby(course_sections_t.course_subject_prefix)
-        .groupby(course_sections_t.course_number)
-        .groupby(course_sections_t.course_title)
+        course_summaries_q.select("*")
+        .where(course_summaries_t.semester_id == semester_id)
         .limit(limit)
         .offset(offset)
     )
 
+    # Values that require exact matches
+    for col in ["subject_prefix", "number"]:
+        if search.get(col):
+            q = q.where(course_summaries_t[col] == search[col])
+
+    # Values that require wildcards
+    for col in ["title"]:
+        if search.get(col):
+            q = q.where(course_summaries_t[col].ilike(f"%{search[col]}%"))
+
     c.execute(q.get_sql())
     return list(map(lambda r: Course(**r), c.fetchall()))
 
 
-def fetch_course_subject_prefixes(conn: RealDictConnection) -> List[str]:
+def fetch_courses(
+    conn: RealDictConnection, semester_id: str, limit: int, offset: int, include_sections: bool = False, trusted: bool = False, **search
+) -> List[Course]:
+    """Fetches a page of courses, optionally with all their sections."""
+    courses = fetch_courses_without_sections(
+        conn, semester_id, limit, offset, **search)
+
+    if include_sections:
+        populate_course_periods(
+            conn, semester_id, courses, include_sections, trusted=trusted)
+
+    return courses
+
+
+def fetch_course_subject_prefixes(conn: RealDictConnection, semester_id: str) -> List[str]:
     cursor = conn.cursor()
-    q: QueryBuilder = (
-        Query.from_(course_sections_t)
-        .select(course_sections_t.course_subject_prefix)
-        .groupby(course_sections_t.course_subject_prefix)
-        .orderby(course_sections_t.course_subject_prefix)
+    cursor.execute(
+        "SELECT value FROM semester_facets WHERE semester_id=%s AND facet='subject_prefixes' ORDER BY value",
+        (semester_id,),
+    )
+    return list(map(lambda record: record["value"], cursor.fetchall()))
+
+
+def fetch_catalog_course(conn: RealDictConnection, subject_prefix: str, number: str) -> Optional[CatalogCourse]:
+    c = conn.cursor()
+    c.execute(
+        "SELECT subject_prefix, number, title, description, prerequisites, min_credits, max_credits, semester_ids "
+        "FROM catalog_courses WHERE subject_prefix=%s AND number=%s",
+        (subject_prefix, number),
+    )
+    record = c.fetchone()
+    return CatalogCourse(**record) if record is not None else None
+
+
+def fetch_catalog_hashes(conn: RealDictConnection) -> Dict[Tuple[str, str], str]:
+    """The content hash of every course scraped from the catalog, by (subject prefix, number)."""
+    c = conn.cursor()
+    c.execute(
+        "SELECT subject_prefix, number, content_hash FROM catalog_courses WHERE content_hash IS NOT NULL")
+    return {(record["subject_prefix"], record["number"]): record["content_hash"] for record in c.fetchall()}
+
+
+def update_catalog_course(conn: RealDictConnection, course: CatalogCourse, source_url: str, content_hash: str):
+    """Stores a course scraped from the catalog, keeping the semesters it is linked to."""
+    c = conn.cursor()
+    c.execute(
+        """
+        INSERT INTO catalog_courses (
+            subject_prefix, number, title, description, prerequisites, min_credits, max_credits,
+            source_url, content_hash, fetched_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (subject_prefix, number) DO UPDATE SET
+            title = EXCLUDED.title,
+            description = EXCLUDED.description,
+            prerequisites = EXCLUDED.prerequisites,
+            min_credits = EXCLUDED.min_credits,
+            max_credits = EXCLUDED.max_credits,
+            source_url = EXCLUDED.source_url,
+            content_hash = EXCLUDED.content_hash,
+            fetched_at = EXCLUDED.fetched_at
+        """,
+        (course.subject_prefix, course.number, course.title, course.description, course.prerequisites,
+         course.min_credits, course.max_credits, source_url, content_hash),
+    )
+
+
+def fetch_facets(conn: RealDictConnection, semester_id: str) -> Facets:
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT facet, value, count FROM semester_facets WHERE semester_id=%s ORDER BY facet, value",
+        (semester_id,),
     )
 
-    cursor.execute(q.get_sql())
-    return list(map(lambda record: record["course_subject_prefix"], cursor.fetchall()))
+    facets: Dict[str, List[FacetValue]] = {
+        facet: [] for facet in Facets.__fields__ if facet != "semester_id"}
+    for record in cursor.fetchall():
+        if record["facet"] in facets:
+            facets[record["facet"]].append(
+                FacetValue(value=record["value"], count=record["count"]))
+
+    # Credits are stored as text, order them numerically instead
+    facets["credits"].sort(key=lambda facet_value: int(facet_value.value))
+
+    return Facets(semester_id=semester_id, **facets)
 
 
-def records_to_sections(conn: RealDictConnection, semester_id: str, records: List[Dict]) -> List[CourseSection]:
+def records_to_sections(conn: RealDictConnection, semester_id: str, records: List[Dict], trusted: bool = False) -> List[CourseSection]:
     sections = []
     for record in records:
         periods = fetch_course_section_periods(
-            conn, semester_id, record["crn"])
+            conn, semester_id, record["crn"], trusted)
 
-        sections.append(CourseSection.from_record(record, periods))
+        sections.append(CourseSection.from_record(record, periods, trusted))
     return sections
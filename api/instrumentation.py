@@ -0,0 +1,242 @@
+"""
+Request, query and import instrumentation exposed as Prometheus metrics on `/metrics` (which needs an API key).
+
+Requests slower than `SLOW_REQUEST_MS` and queries slower than `SLOW_QUERY_MS` are also logged
+so hot paths can be found in production without attaching a profiler. Set either to 0 to disable.
+"""
+
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+from prometheus_client import Counter, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("orca")
+
+T = TypeVar("T")
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 250))
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 1000))
+
+REQUEST_DURATION = Histogram(
+    "orca_request_duration_seconds",
+    "Time spent handling requests, by endpoint.",
+    ["method", "endpoint", "status"],
+)
+QUERY_DURATION = Histogram(
+    "orca_db_query_duration_seconds",
+    "Time spent executing database queries, by query fingerprint.",
+    ["query"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+QUERY_ROWS = Counter(
+    "orca_db_query_rows_total",
+    "Rows returned or affected by database queries, by query fingerprint.",
+    ["query"],
+)
+POOL_WAIT = Histogram(
+    "orca_db_pool_wait_seconds",
+    "Time spent waiting for a connection from the connection pool.",
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5),
+)
+DB_READS = Counter(
+    "orca_db_reads_total",
+    "Read connections handed out, by the database they were taken from.",
+    ["database"],
+)
+REQUESTS_REJECTED = Counter(
+    "orca_requests_rejected_total",
+    "Requests turned away before reaching the database, by reason.",
+    ["reason"],
+)
+COALESCED_REQUESTS = Counter(
+    "orca_coalesced_requests_total",
+    "Reads that waited for an identical read already in flight instead of querying, by read.",
+    ["read"],
+)
+IMPORT_STAGE_DURATION = Histogram(
+    "orca_import_stage_duration_seconds",
+    "Time spent in each stage of a semester import.",
+    ["stage"],
+    buckets=(.1, .5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+class QueryCounter:
+    """Counts the queries executed while handling a single request."""
+
+    def __init__(self):
+        self.count = 0
+
+
+query_counter: ContextVar[Optional[QueryCounter]] = ContextVar(
+    "query_counter", default=None)
+
+
+def start_query_count() -> QueryCounter:
+    """Starts counting the queries executed in the current context (request) and returns the counter."""
+    counter = QueryCounter()
+    query_counter.set(counter)
+    return counter
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_ARRAY_LIST = re.compile(r"\[\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\]")
+_REPEATED_VALUE_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_VALUES = re.compile(r"\bVALUES\s*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _collapse_values_rows(sql: str) -> str:
+    """Collapses every row of VALUES lists to `(...)`, whatever it holds (NULLs, arrays, casts, function calls)."""
+    parts = []
+    end = 0
+    for match in _VALUES.finditer(sql):
+        if match.start() < end:
+            continue
+        parts.append(sql[end:match.end()])
+        end = match.end()
+        # Consume `(...), (...), ...` with balanced parentheses, literals having already been replaced
+        while end < len(sql) and sql[end] == "(":
+            depth, i = 0, end
+            while i < len(sql):
+                depth += {"(": 1, ")": -1}.get(sql[i], 0)
+                i += 1
+                if depth == 0:
+                    break
+            parts.append("(...)")
+            end = i
+            separator = re.match(r"\s*,\s*(?=\()", sql[end:])
+            if separator is None:
+                break
+            parts.append(", ")
+            end += separator.end()
+    parts.append(sql[end:])
+    return "".join(parts)
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes SQL so that executions of the same query with different values share one fingerprint.
+    Literals become `?` and lists of values (IN lists, multi-row VALUES, arrays) collapse to `(...)`.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _collapse_values_rows(sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    sql = _ARRAY_LIST.sub("[...]", sql)
+    sql = _REPEATED_VALUE_LISTS.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def observe_query(sql: str, duration: float, rows: int):
+    """Records a finished query in the current request's query count and the query metrics."""
+    counter = query_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+    query = fingerprint(sql)
+    QUERY_DURATION.labels(query).observe(duration)
+    if rows > 0:
+        QUERY_ROWS.labels(query).inc(rows)
+
+    if SLOW_QUERY_MS and duration * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms, %d rows): %s",
+                       duration * 1000, rows, query)
+
+
+@contextmanager
+def import_stage(stage: str) -> Iterator[None]:
+    """Times a stage of an import (fetch, parse, load)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMPORT_STAGE_DURATION.labels(stage).observe(
+            time.perf_counter() - start)
+
+
+def timed_iter(stage: str, iterable: Iterable[T]) -> Iterator[T]:
+    """
+    Yields from `iterable`, recording the total time spent producing its items as an import stage.
+    Time spent by the consumer between items is not counted, so streamed stages can be timed separately.
+    """
+    iterator = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                total += time.perf_counter() - start
+            yield item
+    finally:
+        IMPORT_STAGE_DURATION.labels(stage).observe(total)
+
+
+class InstrumentationMiddleware:
+    """
+    Records the latency of every request by endpoint and adds an `X-Query-Count` header
+    with the number of database queries made for the request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.route_paths: Dict[object, str] = {}
+
+    def endpoint_label(self, scope: Scope) -> str:
+        """The path template of the route that handled the request, e.g. `/{semester_id}/sections`."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+
+        if endpoint not in self.route_paths:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    self.route_paths[endpoint] = route.path
+                    break
+            else:
+                self.route_paths[endpoint] = endpoint.__name__
+        return self.route_paths[endpoint]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = start_query_count()
+        status = 500
+        start = time.perf_counter()
+
+        async def send_instrumented(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(counter.count)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            duration = time.perf_counter() - start
+            endpoint = self.endpoint_label(scope)
+            REQUEST_DURATION.labels(
+                scope["method"], endpoint, status).observe(duration)
+
+            if SLOW_REQUEST_MS and duration * 1000 >= SLOW_REQUEST_MS:
+                query_string = scope.get("query_string", b"").decode()
+                logger.warning("Slow request (%.1f ms, %d queries): %s %s%s",
+                               duration * 1000, counter.count, scope["method"], scope["path"],
+                               "?" + query_string if query_string else "")
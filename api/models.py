@@ -1,10 +1,20 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Type, TypeVar
 from pydantic import BaseModel
 from pydantic.fields import Field
 import datetime
 
 from enum import Enum
 
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def construct_trusted(model: Type[Model], record: Dict[str, Any]) -> Model:
+    """
+    Builds a model from a record that came out of our own database without running validation.
+    Only the model's own fields are copied over so the serialized shape matches a validated model.
+    """
+    return model.construct(**{name: record[name] for name in model.__fields__ if name in record})
+
 
 class Semester(BaseModel):
     semester_id: str = Field(example="202101")
@@ -14,7 +24,6 @@ class Semester(BaseModel):
 
     @staticmethod
     def from_record(record: Dict[str, Any]):
-        print(record)
         return Semester(
             **record, start_date=record["start_end"].lower, end_date=record["start_end"].upper)
 
@@ -54,8 +63,10 @@ class CourseSectionPeriod(BaseModel):
     )
 
     @staticmethod
-    def from_record(record: Dict[str, Any]):
-        """Creates a CourseSectionPeriod from a DB record."""
+    def from_record(record: Dict[str, Any], trusted: bool = False):
+        """Creates a CourseSectionPeriod from a DB record. Trusted records skip validation."""
+        if trusted:
+            return construct_trusted(CourseSectionPeriod, record)
         return CourseSectionPeriod(**record)
 
     def to_record(self) -> Dict[str, Any]:
@@ -87,10 +98,12 @@ class CourseSection(BaseModel):
     textbooks_url: Optional[str] = None
 
     @staticmethod
-    def from_record(record: Dict[str, Any], periods: Optional[List[CourseSectionPeriod]] = None):
-        """Creates a CourseSection from a DB record."""
+    def from_record(record: Dict[str, Any], periods: Optional[List[CourseSectionPeriod]] = None, trusted: bool = False):
+        """Creates a CourseSection from a DB record. Trusted records skip validation."""
         record["periods"] = periods
 
+        if trusted:
+            return construct_trusted(CourseSection, record)
         return CourseSection(**record)
 
     def to_record(self) -> Dict[str, Any]:
@@ -106,4 +119,57 @@ class Course(BaseModel):
     subject_prefix: str = Field(example="BIOL")
     number: str = Field(example="1010")
     title: str = Field(example="INTRODUCTION TO BIOLOGY")
+    section_count: Optional[int] = Field(
+        None, example=3, description="The number of sections of the course.")
+    total_seats: Optional[int] = Field(
+        None, example=150, description="The max enrollments of all sections combined.")
+    open_seats: Optional[int] = Field(
+        None, example=2, description="The unfilled seats of all sections combined.")
+    min_credits: Optional[int] = Field(None, example=4)
+    max_credits: Optional[int] = Field(None, example=4)
+    period_types: List[ClassTypeEnum] = Field(
+        [], example=[ClassTypeEnum.LECTURE, ClassTypeEnum.LAB], description="The types of periods held by any section.")
     sections: Optional[List[CourseSection]] = Field()
+
+    class Config:
+        use_enum_values = True
+
+
+class FacetValue(BaseModel):
+    value: str = Field(example="CSCI")
+    count: int = Field(
+        example=120, description="The number of sections with this value.")
+
+
+class Facets(BaseModel):
+    semester_id: str = Field(example="202101")
+    subject_prefixes: List[FacetValue]
+    instructors: List[FacetValue]
+    period_types: List[FacetValue]
+    instruction_methods: List[FacetValue]
+    credits: List[FacetValue]
+    locations: List[FacetValue]
+
+
+class RoomBooking(BaseModel):
+    crn: str = Field(example="42608")
+    day: int = Field(example=1, description="Day of week the room is booked (0-Sunday)")
+    start_time: str = Field(
+        example="14:00", description="24-hour 0-padded start time hh:mm format (RPI time)")
+    end_time: str = Field(
+        example="15:50", description="24-hour 0-padded end time hh:mm format (RPI time)")
+
+
+class CatalogCourse(BaseModel):
+    subject_prefix: str = Field(example="CSCI")
+    number: str = Field(example="1100")
+    title: str = Field(example="COMPUTER SCIENCE I")
+    description: Optional[str] = Field(
+        None, example="An introduction to computer programming, algorithm design and analysis.",
+        description="From the course catalog, null until the catalog has been scraped.")
+    prerequisites: Optional[str] = Field(
+        None, example="Prerequisite: MATH 1010.", description="From the course catalog.")
+    min_credits: Optional[int] = Field(None, example=4)
+    max_credits: Optional[int] = Field(None, example=4)
+    semester_ids: List[str] = Field(
+        [], example=["202009", "202101"], description="The semesters the course has sections in, oldest first.")
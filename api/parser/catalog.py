@@ -0,0 +1,140 @@
+from api.models import CatalogCourse
+from api.instrumentation import import_stage
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+import hashlib
+import re
+import lxml.html
+
+import requests
+
+COURSE_LINK = re.compile(r"^\s*([A-Z]{4})\s+(\w+)\s+-\s+(.+?)\s*$")
+CREDITS = re.compile(r"(\d+)(?:\s*(?:to|-|–)\s*(\d+))?")
+
+
+class Catalog:
+    """
+    Web scraper for the course catalog, the only place with course descriptions and prerequisites.
+    The catalog is an Acalog site: each catalog year has an id (`catoid`) and lists its courses across
+    pages of its course index (`navoid`), each linking to a preview page of the course.
+    """
+
+    BASE_URL = "https://catalog.rpi.edu/"
+
+    def __init__(self):
+        self.session = requests.Session()
+
+    def iter_course_links(self, catalog_id: str, navigation_id: str) -> Iterator[Tuple[str, str, str]]:
+        """Yields the (subject prefix, number, url) of every course in the catalog."""
+        page_number = 1
+        # Acalog answers pages past the end with the last page again, so stop once a page has nothing new
+        seen = set()
+        while True:
+            with import_stage("fetch"):
+                page = self.session.get(urljoin(Catalog.BASE_URL, "content.php"), params={
+                    "catoid": catalog_id,
+                    "navoid": navigation_id,
+                    "filter[cpage]": page_number,
+                    "filter[item_type]": 3,
+                    "filter[only_active]": 1,
+                    "filter[3]": 1,
+                })
+
+            with import_stage("parse"):
+                links = [link for link in Catalog._parse_course_links(page.content) if link not in seen]
+            if len(links) == 0:
+                return
+
+            seen.update(links)
+            yield from links
+            page_number += 1
+
+    def fetch_course_page(self, url: str) -> bytes:
+        with import_stage("fetch"):
+            return self.session.get(url).content
+
+    @staticmethod
+    def _parse_course_links(content: bytes) -> List[Tuple[str, str, str]]:
+        doc = lxml.html.fromstring(content)
+
+        links = []
+        for a in doc.xpath('//a[contains(@href, "preview_course_nopop.php")]'):
+            match = COURSE_LINK.match(a.text_content())
+            if match:
+                links.append((match.group(1), match.group(2),
+                              urljoin(Catalog.BASE_URL, a.get("href"))))
+        return links
+
+    @staticmethod
+    def _course_block(content: bytes) -> Optional[lxml.html.HtmlElement]:
+        """The element holding the course itself, without the rest of the page."""
+        doc = lxml.html.fromstring(content)
+        titles = doc.xpath('//h1[@id="course_preview_title"]')
+        if len(titles) == 0:
+            return None
+        return titles[0].getparent()
+
+    @staticmethod
+    def content_hash(content: bytes) -> Optional[str]:
+        """
+        Hash of the course on a course page, which only changes when the course does (and not when the
+        rest of the page, e.g. navigation, does). None if the page has no course.
+        """
+        block = Catalog._course_block(content)
+        if block is None:
+            return None
+        return hashlib.sha256(lxml.html.tostring(block)).hexdigest()
+
+    @staticmethod
+    def parse_course_page(content: bytes) -> Optional[CatalogCourse]:
+        """
+        Parses a course page. The course title is followed by its description and then labeled fields:
+        <h1>CSCI 1100 - Computer Science I</h1> Description... <strong>Credit Hours:</strong> 4 ...
+        """
+        block = Catalog._course_block(content)
+        if block is None:
+            return None
+
+        title = block.xpath('h1[@id="course_preview_title"]')[0]
+        match = COURSE_LINK.match(title.text_content())
+        if match is None:
+            return None
+
+        # Group the text after the title by the label it follows, the description having none
+        fields: Dict[str, List[str]] = {"": []}
+        label = ""
+
+        def add(text: Optional[str]):
+            if text and text.strip():
+                fields[label].append(text.strip())
+
+        add(title.tail)
+        for element in title.itersiblings():
+            if element.tag in ("strong", "b") and element.text_content().strip().endswith(":"):
+                label = element.text_content().strip()[:-1].strip()
+                fields.setdefault(label, [])
+            elif element.tag not in ("script", "style") and "display: none" not in element.get("style", ""):
+                add(element.text_content())
+            add(element.tail)
+
+        def field(*prefixes: str) -> Optional[str]:
+            for name, values in fields.items():
+                if name and name.startswith(prefixes) and values:
+                    return " ".join(values)
+            return None
+
+        min_credits, max_credits = None, None
+        credits = CREDITS.search(field("Credit Hours") or "")
+        if credits:
+            min_credits = int(credits.group(1))
+            max_credits = int(credits.group(2) or credits.group(1))
+
+        return CatalogCourse(
+            subject_prefix=match.group(1),
+            number=match.group(2),
+            title=match.group(3).upper(),
+            description=" ".join(fields[""]) or None,
+            prerequisites=field("Prerequisite", "Corequisite"),
+            min_credits=min_credits,
+            max_credits=max_credits,
+        )
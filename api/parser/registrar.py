@@ -1,6 +1,7 @@
 from api.models import ClassTypeEnum
 from api.parser import DAY_LETTERS, PERIOD_TYPES
 from api.parser.utils import extract_td_value
+from api.instrumentation import import_stage
 from typing import Dict, List, Tuple
 import re
 import lxml.html
@@ -38,9 +39,16 @@ class Registrar:
         """
 
         print("Downloading schedule page... ", end="", flush=True)
-        page = requests.get(Registrar.BASE_URL + semester_id + ".htm")
-        doc = lxml.html.fromstring(page.content)
+        with import_stage("fetch"):
+            page = requests.get(Registrar.BASE_URL + semester_id + ".htm")
         print("Done.")
+
+        with import_stage("parse"):
+            return Registrar._parse_period_types_page(page.content)
+
+    @staticmethod
+    def _parse_period_types_page(content: bytes) -> Dict[Tuple[str, int, str], ClassTypeEnum]:
+        doc = lxml.html.fromstring(content)
         rows = doc.xpath('//tr[@align = "LEFT"]')
 
         period_types = dict()
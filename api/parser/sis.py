@@ -5,9 +5,10 @@ lists ALL course sections for a particular semester.
 
 from api.parser import DAY_LETTERS
 from api.parser.utils import extract_td_value, sanitize
+from api.instrumentation import import_stage, timed_iter
 from enum import Enum
 from api.models import ClassTypeEnum, CourseSection, CourseSectionPeriod
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
 import requests
 import lxml.html
 from lxml import etree
@@ -89,51 +90,102 @@ class SIS:
         semester_id: str, subjects: List[str] = None,
         period_types: Dict[Tuple[str, int, str], ClassTypeEnum] = dict()
     ) -> List[CourseSection]:
+        return list(self.iter_course_sections(semester_id, subjects, period_types))
+
+    def iter_course_sections(
+        self,
+        semester_id: str, subjects: List[str] = None,
+        period_types: Dict[Tuple[str, int, str], ClassTypeEnum] = dict()
+    ) -> Iterator[CourseSection]:
+        """
+        Yields course sections (with their periods) one by one as the course search page is downloaded and parsed,
+        so the whole page and every section never have to be in memory at once.
+        """
 
         if subjects is None:
             subjects = self.fetch_subjects(semester_id)
 
-        # Submit search page and parse document
-        course_sections_page = self.session.get(
-            SIS.COURSE_SEARCH_URL,
-            params=self._create_search_params(semester_id, subjects),
-        )
-        tree = lxml.html.fromstring(course_sections_page.content)
-
-        # Query for all rows in the sections table, Skip first two heading rows
-        section_rows = tree.xpath(
-            "//table[./caption[contains(text(), 'Sections Found')]]//tr"
-        )[2:]
-
-        last_crn = "start"
-        sections = dict()
-        for tr in section_rows:
-            # Each TD can have different elements in it
-            # extract_td_value will properly determine the string values or return None for empty
-            tds = tr.xpath("td")
-            if len(tds) == 0:
+        # Submit search page and stream the document into the parser
+        with import_stage("fetch"):
+            course_sections_page = self.session.get(
+                SIS.COURSE_SEARCH_URL,
+                params=self._create_search_params(semester_id, subjects),
+                stream=True,
+            )
+        course_sections_page.raw.decode_content = True
+
+        # Downloading the rest of the page happens while parsing, so it is timed as part of it
+        yield from timed_iter("parse", SIS._iter_course_sections(
+            semester_id, course_sections_page.raw, period_types))
+
+    @staticmethod
+    def _iter_section_rows(page: BinaryIO) -> Iterator[List[Optional[str]]]:
+        """
+        Incrementally parses the course search page and yields the values of each row in the sections table.
+        Rows are discarded once parsed so memory stays bounded no matter how large the page is.
+        """
+        rows_seen = 0
+        for _, tr in etree.iterparse(page, events=("end",), tag="tr", html=True):
+            # Only rows of the sections table
+            in_sections_table = any(
+                table.xpath("./caption[contains(text(), 'Sections Found')]")
+                for table in tr.iterancestors("table")
+            )
+            if not in_sections_table:
                 continue
-            # Add empty values since SIS doesn't create a TD for them
-            i = 0
-            while i < len(tds):
-                if tds[i].xpath("@colspan"):
-                    # Need to add another empty td
-                    tds.insert(i + 1, etree.Element("td"))
-                i += 1
-            values = list(map(extract_td_value, tds))
-
-            if values[Column.CRN] is not None and values[Column.CRN] != last_crn:
+
+            # Skip first two heading rows
+            rows_seen += 1
+            if rows_seen > 2:
+                # Each TD can have different elements in it
+                # extract_td_value will properly determine the string values or return None for empty
+                tds = tr.xpath("td")
+                if len(tds) > 0:
+                    # Add empty values since SIS doesn't create a TD for them
+                    i = 0
+                    while i < len(tds):
+                        if tds[i].xpath("@colspan"):
+                            # Need to add another empty td
+                            tds.insert(i + 1, etree.Element("td"))
+                        i += 1
+                    yield list(map(extract_td_value, tds))
+
+            # Free the rows already parsed (but not the table's caption)
+            tr.clear()
+            while tr.getprevious() is not None and tr.getprevious().tag == "tr":
+                tr.getparent().remove(tr.getprevious())
+
+    @staticmethod
+    def _iter_course_sections(
+        semester_id: str, page: BinaryIO,
+        period_types: Dict[Tuple[str, int, str], ClassTypeEnum]
+    ) -> Iterator[CourseSection]:
+        """Groups the rows of the course search page into course sections, yielding each once all its periods are parsed."""
+        section: Optional[CourseSection] = None
+        seen_crns = set()
+        for values in SIS._iter_section_rows(page):
+            if values[Column.CRN] is not None and (section is None or values[Column.CRN] != section.crn):
                 # New section
-                sections[values[Column.CRN]] = SIS._create_course_section(
-                    semester_id, values
-                )
-                last_crn = values[Column.CRN]
+                if section is not None:
+                    yield section
+
+                if values[Column.CRN] in seen_crns:
+                    # Already yielded, don't load it twice
+                    section = None
+                    continue
+
+                section = SIS._create_course_section(semester_id, values)
+                seen_crns.add(section.crn)
+
+            if section is None:
+                continue
 
             period = SIS._create_course_section_period(
-                semester_id, last_crn, values, period_types)
-            sections[last_crn].periods.append(period)
+                semester_id, section.crn, values, period_types)
+            section.periods.append(period)
 
-        return list(sections.values())
+        if section is not None:
+            yield section
 
     @staticmethod
     def _create_course_section_period(
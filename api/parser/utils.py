@@ -1,4 +1,8 @@
-from typing import Any, Optional
+import threading
+from queue import Full, Queue
+from typing import Any, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
 
 
 def sanitize(str: str) -> str:
@@ -18,4 +22,58 @@ def extract_td_value(td: Any) -> Optional[str]:
             return None
         return sanitized
     else:
-        return None
\ No newline at end of file
+        return None
+
+def time_to_minutes(time: str) -> int:
+    """Converts a 24-hour hh:mm time to the number of minutes since midnight, e.g. `"14:05"` -> `845`."""
+    hours, minutes = map(int, time.split(":"))
+    return hours * 60 + minutes
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Converts minutes since midnight to a 24-hour 0-padded hh:mm time, e.g. `845` -> `"14:05"`."""
+    return f"{str(minutes // 60).zfill(2)}:{str(minutes % 60).zfill(2)}"
+
+
+def prefetch(iterable: Iterable[T], max_size: int) -> Iterator[T]:
+    """
+    Iterates `iterable` in a background thread, buffering up to `max_size` items ahead of the consumer.
+    This lets a parser keep downloading and parsing while the consumer is busy writing to the database,
+    without the buffer growing unbounded. Exceptions raised by `iterable` are re-raised to the consumer.
+    """
+    end = object()
+    queue: Queue = Queue(maxsize=max_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up if the consumer stopped iterating so the thread doesn't block forever
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+        else:
+            put((end, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
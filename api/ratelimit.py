@@ -0,0 +1,142 @@
+"""
+Token bucket rate limiting per API key (or per client IP without a valid key) and endpoint class.
+
+Each endpoint class has its own quota, configured with `RATE_LIMIT_<CLASS>` as `<requests per second>/<burst>`,
+e.g. `RATE_LIMIT_BULK=2/10`. Requests with a valid API key get `RATE_LIMIT_KEY_MULTIPLIER` times the quota.
+A rate of 0 disables limiting for the class. Limited requests get a 429 with a `Retry-After` header.
+
+Behind a proxy, clients are identified by the address `TRUSTED_PROXY_HOPS` entries from the end of
+`X-Forwarded-For`, the one the closest proxy appended. Earlier entries are sent by the client and can be anything.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Security
+
+from .instrumentation import REQUESTS_REJECTED
+from .security import API_KEYS, OPTIONAL_API_KEY_QUERY
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity` requests."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens +
+                          (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Takes a token if there is one and returns 0, otherwise returns how many seconds until there is one."""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def parse_quota(quota: str) -> Tuple[float, float]:
+    """Parses a `<requests per second>/<burst>` quota like `5/20`."""
+    rate, _, burst = quota.partition("/")
+    return float(rate), float(burst or rate)
+
+
+DEFAULT_QUOTAS = {
+    # Single CRN, subject, facet and room lookups
+    "lookup": "20/40",
+    # Filtered searches that scan a semester
+    "search": "5/20",
+    # Large responses, e.g. courses with all their sections
+    "bulk": "2/10",
+}
+
+QUOTAS: Dict[str, Tuple[float, float]] = {
+    endpoint_class: parse_quota(os.environ.get(
+        f"RATE_LIMIT_{endpoint_class.upper()}", default))
+    for endpoint_class, default in DEFAULT_QUOTAS.items()
+}
+
+KEY_MULTIPLIER = float(os.environ.get("RATE_LIMIT_KEY_MULTIPLIER", 10))
+"""How many times the quota requests made with a valid API key get."""
+
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 1))
+"""How many proxies in front of the app append to `X-Forwarded-For`, e.g. 1 for the Heroku router. 0 ignores it."""
+
+MAX_BUCKETS = 100_000
+"""Full buckets are pruned past this many so a flood of new clients can't grow memory without bound."""
+
+
+class RateLimiter:
+    def __init__(self, quotas: Dict[str, Tuple[float, float]], key_multiplier: float = 1):
+        self.quotas = quotas
+        self.key_multiplier = key_multiplier
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def check(self, endpoint_class: str, client: str, has_key: bool = False) -> float:
+        """Counts a request from `client` against its quota and returns 0 if allowed, otherwise the seconds to wait."""
+        rate, burst = self.quotas[endpoint_class]
+        if rate <= 0:
+            return 0.0
+        if has_key:
+            rate, burst = rate * self.key_multiplier, burst * self.key_multiplier
+
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get((endpoint_class, client))
+            if bucket is None:
+                if len(self.buckets) >= MAX_BUCKETS:
+                    self.prune(now)
+                bucket = self.buckets[(endpoint_class, client)] = TokenBucket(
+                    rate, burst)
+            return bucket.take(now)
+
+    def prune(self, now: float):
+        """Forgets clients whose buckets have refilled, since a new bucket would be identical."""
+        for key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.buckets[key]
+
+
+rate_limiter = RateLimiter(QUOTAS, KEY_MULTIPLIER)
+
+
+def client_ip(request: Request, trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """The address of the client that connected to the outermost trusted proxy."""
+    forwarded = [hop.strip() for header in request.headers.getlist("x-forwarded-for")
+                 for hop in header.split(",") if hop.strip()]
+    if trusted_hops > 0 and len(forwarded) >= trusted_hops:
+        return forwarded[-trusted_hops]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(endpoint_class: str) -> Callable:
+    """Creates a dependency that rate limits an endpoint as part of `endpoint_class`."""
+    if endpoint_class not in QUOTAS:
+        raise ValueError(f"Unknown endpoint class {endpoint_class!r}")
+
+    async def check_rate_limit(request: Request, api_key: Optional[str] = Security(OPTIONAL_API_KEY_QUERY)):
+        # Unknown keys are ignored so clients can't get fresh buckets by making keys up
+        has_key = api_key in API_KEYS
+        client = f"key:{api_key}" if has_key else f"ip:{client_ip(request)}"
+
+        retry_after = rate_limiter.check(endpoint_class, client, has_key)
+        if retry_after > 0:
+            REQUESTS_REJECTED.labels("rate_limited").inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return check_rate_limit
@@ -0,0 +1,130 @@
+"""
+Response encoding for the read endpoints.
+
+FastAPI normally re-validates whatever an endpoint returns against its `response_model` and then
+runs it through `jsonable_encoder`. Data coming out of our own database has already been validated
+when it was imported, so with `FAST_SERIALIZATION=true` endpoints skip that and encode the models directly.
+
+Clients can also ask for a compact MessagePack body with `Accept: application/msgpack`, so responses of
+endpoints using `serialize` carry `Vary: Accept` (set by `vary_on_accept` when FastAPI builds the response).
+"""
+
+import datetime
+import json
+import os
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette.requests import Request
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, clients asking for it get JSON instead
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+MSGPACK_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {
+        "content": {"application/msgpack": {}},
+        "description": "The same body encoded as MessagePack when requested with `Accept: application/msgpack`.",
+    }
+}
+"""OpenAPI `responses` for endpoints that can be served as MessagePack."""
+
+FAST_SERIALIZATION = os.environ.get(
+    "FAST_SERIALIZATION", "false").lower() == "true"
+"""Opt-in: skip response validation for data loaded from our own database."""
+
+
+def _default(obj: Any) -> Any:
+    """Encodes the values the JSON encoders don't know about. Nested models are encoded field by field."""
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes pydantic models without validating or copying them first."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MsgPackResponse(Response):
+    """MessagePack response with the same structure as the JSON body."""
+
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default)
+
+
+def parse_accept(accept: str) -> Dict[str, float]:
+    """Parses an `Accept`/`Accept-Encoding` header into a mapping of value to quality, e.g. `{"gzip": 1.0, "br": 0.5}`."""
+    qualities = {}
+    for part in accept.split(","):
+        value, *params = part.strip().split(";")
+        if not value:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.strip().lower()] = quality
+    return qualities
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Determines if the client prefers MessagePack over JSON."""
+    if msgpack is None or not accept:
+        return False
+
+    qualities = parse_accept(accept)
+    msgpack_quality = max(qualities.get(media_type, 0.0)
+                          for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = max(qualities.get("application/json", 0.0),
+                       qualities.get("application/*", 0.0), qualities.get("*/*", 0.0))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+async def vary_on_accept(response: Response):
+    """
+    Dependency for endpoints using `serialize`. Adds `Vary: Accept` to the response FastAPI builds when
+    the endpoint returns plain content (it ignores these headers when the endpoint returns a response itself).
+    """
+    response.headers.add_vary_header("Accept")
+
+
+def serialize(request: Request, content: Any) -> Any:
+    """
+    Returns `content` as a `MsgPackResponse` if the client asked for it, or as a `FastJSONResponse` when
+    the fast path is enabled, both bypassing the endpoint's `response_model`.
+    Otherwise returns it untouched for FastAPI to validate and serialize as usual.
+    """
+    response: Response
+    if wants_msgpack(request.headers.get("accept")):
+        response = MsgPackResponse(content)
+    elif FAST_SERIALIZATION:
+        response = FastJSONResponse(content)
+    else:
+        return content
+
+    response.headers.add_vary_header("Accept")
+    return response
@@ -0,0 +1,234 @@
+"""
+In-memory columnar index of a semester's sections for answering searches without SQL.
+
+Each section is a row across NumPy arrays (enrollments, credits and days as bitmasks, meeting time bounds,
+integer-coded subject, number and period types) so any combination of filters is a handful of vectorized
+comparisons. Indexes are built from the same records `CourseSection.from_record` consumes, and are rebuilt
+when the semester is imported again (checked at most every `SECTION_INDEX_TTL` seconds). Only the
+`SECTION_INDEX_SEMESTERS` most recently searched semesters are kept.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from psycopg2.extras import RealDictConnection
+
+from .models import ClassTypeEnum, CourseSection, CourseSectionPeriod
+from .parser.utils import time_to_minutes
+
+SECTION_INDEX_TTL = float(os.environ.get("SECTION_INDEX_TTL", 5))
+"""Seconds an index is used before checking whether the semester has been imported since it was built."""
+
+PERIOD_TYPE_CODES = {period_type.value: code for code,
+                     period_type in enumerate(ClassTypeEnum)}
+
+NO_START = 24 * 60
+NO_END = -1
+
+
+def bitmask(values: Iterable[int]) -> int:
+    """Bitmask with the bits of the values set, e.g. days of week (bit 0 being Sunday) or credits."""
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+class SemesterIndex:
+    def __init__(self, section_records: List[Dict[str, Any]], period_records: List[Dict[str, Any]]):
+        """`section_records` must already be in the order search results are returned in."""
+        self.section_records = section_records
+        self.periods_by_crn: Dict[str, List[Dict[str, Any]]] = {}
+        for record in period_records:
+            self.periods_by_crn.setdefault(record["crn"], []).append(record)
+
+        n = len(section_records)
+        self.subjects, self.subject_codes = np.unique(
+            [record["course_subject_prefix"] for record in section_records], return_inverse=True)
+        self.numbers, self.number_codes = np.unique(
+            [record["course_number"] for record in section_records], return_inverse=True)
+        self.titles = np.array([record["course_title"].lower()
+                                for record in section_records], dtype=str)
+        self.enrollments = np.array(
+            [record["enrollments"] for record in section_records], dtype=np.int32)
+        self.max_enrollments = np.array(
+            [record["max_enrollments"] for record in section_records], dtype=np.int32)
+        self.credits = np.array([bitmask(credit for credit in record["credits"] if 0 <= credit < 63)
+                                 for record in section_records], dtype=np.int64)
+
+        # One row per period, pointing at its section
+        section_indexes = {record["crn"]: i for i,
+                           record in enumerate(section_records)}
+        periods = [(section_indexes[record["crn"]], record) for record in period_records
+                   if record["crn"] in section_indexes]
+        self.period_sections = np.array(
+            [i for i, _ in periods], dtype=np.int32)
+        self.period_days = np.array(
+            [bitmask(record["days"]) for _, record in periods], dtype=np.int8)
+        self.period_starts = np.array(
+            [time_to_minutes(record["start_time"]) if record["start_time"] else NO_START for _, record in periods],
+            dtype=np.int16)
+        self.period_ends = np.array(
+            [time_to_minutes(record["end_time"]) if record["end_time"] else NO_END for _, record in periods],
+            dtype=np.int16)
+        self.period_types = np.array(
+            [PERIOD_TYPE_CODES.get(record["type"], -1) for _, record in periods],
+            dtype=np.int8)
+
+        # Reduce the periods to per-section columns so filters never have to look at periods
+        self.days = np.zeros(n, dtype=np.int8)
+        np.bitwise_or.at(self.days, self.period_sections, self.period_days)
+        self.starts = np.full(n, NO_START, dtype=np.int16)
+        np.minimum.at(self.starts, self.period_sections, self.period_starts)
+        self.ends = np.full(n, NO_END, dtype=np.int16)
+        np.maximum.at(self.ends, self.period_sections, self.period_ends)
+        self.types = np.zeros(n, dtype=np.int8)
+        typed = self.period_types >= 0
+        np.bitwise_or.at(self.types, self.period_sections[typed],
+                         (1 << self.period_types[typed]).astype(np.int8))
+
+    def _code(self, values: "np.ndarray", value: str) -> int:
+        """The code of a value in a sorted array of unique values, -1 if it isn't there."""
+        i = int(np.searchsorted(values, value))
+        return i if i < len(values) and values[i] == value else -1
+
+    def filter(
+        self,
+        course_subject_prefix: Optional[str] = None,
+        course_number: Optional[str] = None,
+        course_title: Optional[str] = None,
+        has_seats: Optional[bool] = None,
+        days: Optional[List[int]] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        credits: Optional[int] = None,
+        period_type: Optional[str] = None,
+    ) -> "np.ndarray":
+        """The indexes of the sections matching every given filter, in order. See `search_course_sections`."""
+        mask = np.ones(len(self.section_records), dtype=bool)
+
+        if course_subject_prefix:
+            mask &= self.subject_codes == self._code(
+                self.subjects, course_subject_prefix)
+        if course_number:
+            mask &= self.number_codes == self._code(
+                self.numbers, course_number)
+        if course_title:
+            mask &= np.char.find(self.titles, course_title.lower()) >= 0
+
+        if has_seats == True:
+            mask &= self.enrollments < self.max_enrollments
+        if has_seats == False:
+            mask &= self.enrollments >= self.max_enrollments
+
+        if days:
+            mask &= (self.days & ~bitmask(days)) == 0
+        if start_time:
+            mask &= self.starts >= time_to_minutes(start_time)
+        if end_time:
+            mask &= self.ends <= time_to_minutes(end_time)
+
+        if credits is not None:
+            if 0 <= credits < 63:
+                mask &= (self.credits >> credits) & 1 == 1
+            else:
+                mask[:] = False
+        if period_type:
+            mask &= (self.types >> PERIOD_TYPE_CODES[ClassTypeEnum(
+                period_type).value]) & 1 == 1
+
+        return np.flatnonzero(mask)
+
+    def search(self, limit: int, offset: int, trusted: bool = False, **search) -> List[CourseSection]:
+        """A page of the sections matching every given filter."""
+        # `from_record` adds the periods to the record it's given, copy so the cached records stay untouched
+        return [
+            CourseSection.from_record(
+                dict(self.section_records[i]),
+                [CourseSectionPeriod.from_record(record, trusted)
+                 for record in self.periods_by_crn.get(self.section_records[i]["crn"], [])],
+                trusted,
+            )
+            for i in self.filter(**search)[offset:offset + limit]
+        ]
+
+
+SECTION_INDEX_SEMESTERS = int(os.environ.get("SECTION_INDEX_SEMESTERS", 4))
+"""How many semesters' indexes are kept in memory, the least recently searched are dropped first."""
+
+# semester_id -> (import_id the index was built from, when that was last checked, index), least recently used first
+_indexes: "OrderedDict[str, Tuple[int, float, SemesterIndex]]" = OrderedDict()
+# Guards `_indexes` and `_build_locks`, only ever held briefly
+_indexes_lock = threading.Lock()
+# One per semester so a build only holds up searches of the same semester
+_build_locks: Dict[str, threading.Lock] = {}
+
+
+def _cached(semester_id: str) -> Optional[Tuple[int, float, SemesterIndex]]:
+    with _indexes_lock:
+        cached = _indexes.get(semester_id)
+        if cached is not None:
+            _indexes.move_to_end(semester_id)
+        return cached
+
+
+def _store(semester_id: str, import_id: int, index: SemesterIndex):
+    with _indexes_lock:
+        _indexes[semester_id] = (import_id, time.monotonic(), index)
+        _indexes.move_to_end(semester_id)
+        while len(_indexes) > SECTION_INDEX_SEMESTERS:
+            _indexes.popitem(last=False)
+
+
+def _build_lock(semester_id: str) -> threading.Lock:
+    with _indexes_lock:
+        return _build_locks.setdefault(semester_id, threading.Lock())
+
+
+def _import_id(conn: RealDictConnection, semester_id: str) -> Optional[int]:
+    c = conn.cursor()
+    c.execute(
+        "SELECT MAX(import_id) AS import_id FROM semester_imports WHERE semester_id=%s", (semester_id,))
+    return c.fetchone()["import_id"]
+
+
+def get_semester_index(conn: RealDictConnection, semester_id: str) -> Optional[SemesterIndex]:
+    """
+    The semester's index, built (or rebuilt after an import) with `conn` if needed.
+    None if the semester has no sections, which is never cached so unknown semesters can't fill the cache.
+    """
+    cached = _cached(semester_id)
+    if cached is not None and time.monotonic() - cached[1] < SECTION_INDEX_TTL:
+        return cached[2]
+
+    import_id = _import_id(conn, semester_id)
+    if import_id is None:
+        return None
+    if cached is not None and cached[0] == import_id:
+        _store(semester_id, import_id, cached[2])
+        return cached[2]
+
+    # Build each semester once even when many searches miss at the same time
+    with _build_lock(semester_id):
+        cached = _cached(semester_id)
+        if cached is not None and cached[0] == import_id:
+            return cached[2]
+
+        c = conn.cursor()
+        c.execute(
+            "SELECT * FROM course_sections WHERE semester_id=%s "
+            "ORDER BY course_subject_prefix, course_number, section_id, crn", (semester_id,))
+        section_records = c.fetchall()
+        if len(section_records) == 0:
+            return None
+        c.execute(
+            "SELECT * FROM course_section_periods WHERE semester_id=%s", (semester_id,))
+        period_records = c.fetchall()
+
+        index = SemesterIndex(section_records, period_records)
+        _store(semester_id, import_id, index)
+        return index
@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv, find_dotenv
+from fastapi import HTTPException, Security
 from fastapi.security.api_key import APIKeyQuery
 
 load_dotenv(find_dotenv())
@@ -7,3 +8,16 @@ load_dotenv(find_dotenv())
 API_KEY = os.environ["API_KEY"]
 API_KEY_NAME = "api_key"
 API_KEY_QUERY = APIKeyQuery(name=API_KEY_NAME, auto_error=True)
+
+# Keys are optional on public endpoints, but requests made with a valid one get higher rate limits
+OPTIONAL_API_KEY_QUERY = APIKeyQuery(name=API_KEY_NAME, auto_error=False)
+
+API_KEYS = {API_KEY} | {key.strip()
+                        for key in os.environ.get("API_KEYS", "").split(",") if key.strip()}
+"""All valid API keys: `API_KEY` plus any extra comma-separated ones in `API_KEYS`."""
+
+
+async def require_api_key(api_key: str = Security(API_KEY_QUERY)):
+    """Dependency for endpoints only API key holders can use."""
+    if api_key not in API_KEYS:
+        raise HTTPException(status_code=403, detail="Invalid API key")
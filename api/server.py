@@ -1,22 +1,29 @@
-from api.security import API_KEY_QUERY
+from api.security import API_KEY_QUERY, require_api_key
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.params import Path, Query
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse
 from api import api_version
-from typing import List, Optional
+from typing import Callable, List, Optional, TypeVar
 from .db import (
-    fetch_course_sections, fetch_course_subject_prefixes,
-    fetch_courses_without_sections, fetch_semesters, populate_course_periods,
-    search_course_sections,
+    fetch_catalog_course, fetch_course_sections, fetch_course_subject_prefixes, fetch_courses, fetch_facets,
+    fetch_free_rooms, fetch_room_bookings, fetch_semesters,
+    search_course_sections, search_instructor_sections,
     update_course_sections,
-    postgres_pool
+    postgres_pool, PoolSaturatedError
 )
 from .parser.sis import SIS
-from api.models import Course, CourseSection, Semester
-from pydantic.types import constr
+from .compression import CompressionMiddleware
+from .coalesce import InFlightLimit, SingleFlight
+from .instrumentation import REQUESTS_REJECTED, InstrumentationMiddleware
+from .ratelimit import rate_limit
+from .responses import FAST_SERIALIZATION, MSGPACK_RESPONSES, serialize, vary_on_accept
+from api.models import CatalogCourse, ClassTypeEnum, Course, CourseSection, Facets, RoomBooking, Semester
+from api.parser.utils import time_to_minutes
+from pydantic.types import conint, constr
 from api.parser.registrar import Registrar
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import os
-from psycopg2.extras import RealDictConnection
 
 
 with open("README.md") as f:
@@ -49,17 +56,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses with brotli/gzip when the client accepts it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 500)),
+)
+
+# Record request latencies and how many database queries each request made
+app.add_middleware(InstrumentationMiddleware)
+
+
+@app.exception_handler(PoolSaturatedError)
+async def on_pool_saturated(request: Request, exc: PoolSaturatedError):
+    """Shed load when every database connection stays busy for too long rather than queueing up requests."""
+    REQUESTS_REJECTED.labels("pool_saturated").inc()
+    return JSONResponse({"detail": "Server is busy, try again shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+
+T = TypeVar("T")
+
+# Reads wait for a free connection's worth of room on the event loop, where the wait is bounded,
+# rather than in the threadpool's queue where it isn't
+single_flight = SingleFlight(InFlightLimit(
+    int(os.environ.get("MAX_IN_FLIGHT_READS",
+                       postgres_pool.max_connections * (1 + len(postgres_pool.read_dsns)))),
+    postgres_pool.pool_timeout,
+))
+
+
+async def read(fn: Callable[..., T], semester_id: Optional[str] = None, *args, **kwargs) -> T:
+    """
+    Runs a read function from `api/db.py` as `fn(conn, semester_id, *args, **kwargs)` off the event loop.
+    Identical reads already in flight are waited on instead of repeated, and only the read that actually
+    queries takes a database connection. The result may be shared between requests so it must not be modified.
+    """
+    return await single_flight.run(fn.__name__, postgres_pool.call_read, fn, semester_id, *args, **kwargs)
+
+
 CRN = constr(regex="^[0-9]{5}$")
 """A constrained string that must be a 5 digit number. All CRNs conform to this (I think)."""
 
+TIME = constr(regex="^([01][0-9]|2[0-3]):[0-5][0-9]$")
+"""A constrained string that must be a 24-hour 0-padded hh:mm time."""
+
+DAY = conint(ge=0, le=6)
+"""A constrained int that must be a day of week (0-Sunday)."""
+
+
+@app.get("/metrics", dependencies=[Depends(require_api_key)], include_in_schema=False)
+def get_metrics():
+    """Prometheus metrics for requests, queries and the connection pool."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 
-@app.get("/semesters", tags=["semesters"], response_model=List[Semester], summary="Fetch supported semesters", response_description="Semesters which have their schedules loaded into the API.")
-async def get_semesters(conn: RealDictConnection = Depends(postgres_pool.get_conn)):
-    return fetch_semesters(conn)
+@app.get("/semesters", dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)], tags=["semesters"], response_model=List[Semester], summary="Fetch supported semesters", response_description="Semesters which have their schedules loaded into the API.", responses=MSGPACK_RESPONSES)
+async def get_semesters(request: Request):
+    return serialize(request, await read(fetch_semesters))
 
 
-@app.get("/{semester_id}/sections", tags=["sections"], response_model=List[CourseSection], summary="Get sections from CRNs", response_description="List of found course sections. Excludes CRNs not found.")
+@app.get(
+    "/courses/{subject_prefix}-{number}",
+    dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)],
+    tags=["courses"],
+    summary="Fetch a course from the catalog",
+    response_model=CatalogCourse,
+    responses=MSGPACK_RESPONSES,
+)
+async def get_catalog_course(
+    request: Request,
+    subject_prefix: str = Path(..., example="CSCI"),
+    number: str = Path(..., example="1100"),
+):
+    """
+    Fetch a course's description, prerequisites and credits from the course catalog along with every semester
+    it has sections in, e.g. `/courses/CSCI-1100`.
+    """
+    course = await read(fetch_catalog_course, None, subject_prefix.upper(), number)
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return serialize(request, course)
+
+
+@app.get("/{semester_id}/sections", dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)], tags=["sections"], response_model=List[CourseSection], summary="Get sections from CRNs", response_description="List of found course sections. Excludes CRNs not found.", responses=MSGPACK_RESPONSES)
 async def get_sections(
+    request: Request,
     semester_id: str = Path(
         None,
         example="202101",
@@ -69,21 +149,24 @@ async def get_sections(
         ...,
         description="The direct CRNs of the course sections to fetch.",
         example=["42608"],
-    ),
-    conn: RealDictConnection = Depends(postgres_pool.get_conn)
+    )
 ):
     """Directly fetch course sections from CRNs."""
-    return fetch_course_sections(conn, semester_id, crns)
+    # Sorted so requests for the same CRNs in any order share a read
+    return serialize(request, await read(fetch_course_sections, semester_id, sorted(set(crns)), trusted=FAST_SERIALIZATION))
 
 
 @app.get(
     "/{semester_id}/sections/search",
+    dependencies=[Depends(rate_limit("search")), Depends(vary_on_accept)],
     tags=["sections"],
     response_model=List[CourseSection],
     response_description="The paginated list of course sections that match the queries.",
     summary="Search course periods",
+    responses=MSGPACK_RESPONSES,
 )
 async def search_sections(
+    request: Request,
     semester_id: str = Path(
         None,
         example="202101",
@@ -92,8 +175,16 @@ async def search_sections(
     course_subject_prefix: Optional[str] = Query(None),
     course_number: Optional[str] = Query(None),
     course_title: Optional[str] = Query(None),
-    days: Optional[List[str]] = Query(
-        None, title="Meeting days", description="`NOT YET IMPLEMENTED`"),
+    days: Optional[List[DAY]] = Query(
+        None, title="Meeting days", description="Only sections that meet on just these days of week (0-Sunday)", example=[1, 4]),
+    start_time: Optional[TIME] = Query(
+        None, description="Only sections that start at or after this 24-hour 0-padded hh:mm time"),
+    end_time: Optional[TIME] = Query(
+        None, description="Only sections that end at or before this 24-hour 0-padded hh:mm time"),
+    credits: Optional[int] = Query(
+        None, description="Only sections that can be taken for this many credits", ge=0),
+    period_type: Optional[ClassTypeEnum] = Query(
+        None, description="Only sections with a period of this type, e.g. `lab`"),
     has_seats: Optional[bool] = Query(None, title="Has open seats"),
     limit: int = Query(
         10,
@@ -103,32 +194,77 @@ async def search_sections(
     ),
     offset: int = Query(
         0, description="The number of course sections in the response to skip."
-    ),
-    conn: RealDictConnection = Depends(postgres_pool.get_conn)
+    )
 ):
     """
     Search course sections with different query parameters. Always returns a paginated response.
     """
 
-    return search_course_sections(
-        conn,
+    return serialize(request, await read(
+        search_course_sections,
         semester_id,
         limit,
         offset,
+        trusted=FAST_SERIALIZATION,
         course_subject_prefix=course_subject_prefix,
         course_number=course_number,
         course_title=course_title,
         has_seats=has_seats,
+        days=days,
+        start_time=start_time,
+        end_time=end_time,
+        credits=credits,
+        period_type=period_type,
+    ))
+
+
+@app.get(
+    "/{semester_id}/instructors/{name}/sections",
+    dependencies=[Depends(rate_limit("search")), Depends(vary_on_accept)],
+    tags=["sections"],
+    response_model=List[CourseSection],
+    response_description="The paginated list of course sections taught by matching instructors.",
+    summary="Search sections by instructor",
+    responses=MSGPACK_RESPONSES,
+)
+async def get_instructor_sections(
+    request: Request,
+    semester_id: str = Path(
+        None,
+        example="202101",
+        description="The id of the semester, determined by the Registrar.",
+    ),
+    name: str = Path(
+        ...,
+        example="Hanna",
+        description="The start of the instructor's last name, case-insensitive.",
+        min_length=1,
+    ),
+    limit: int = Query(
+        10,
+        description="The maximum number of course sections to return in the response. Max: 50",
+        gt=0,
+        lt=51,
+    ),
+    offset: int = Query(
+        0, description="The number of course sections in the response to skip."
     )
+):
+    """Fetch the sections taught by instructors whose last name starts with `name`."""
+    return serialize(request, await read(
+        search_instructor_sections, semester_id, name, limit, offset, trusted=FAST_SERIALIZATION))
 
 
 @app.get(
     "/{semester_id}/courses",
+    dependencies=[Depends(rate_limit("bulk")), Depends(vary_on_accept)],
     tags=["courses"],
     summary="Fetch/search courses",
     response_model=List[Course],
+    responses=MSGPACK_RESPONSES,
 )
 async def get_courses(
+    request: Request,
     semester_id: str = Path(
         None,
         example="202101",
@@ -138,12 +274,11 @@ async def get_courses(
         False, description="Populate `sections` for each course."),
     include_periods: bool = Query(
         True, description="`NOT YET IMPLEMENTED` Populate `periods` of each section (only checked if `include_sections` is True)"),
-    title: Optional[str] = Query(None, description="`NOT YET IMPLEMENTED`"),
+    title: Optional[str] = Query(None),
     days: Optional[List[str]] = Query(
         None, description="`NOT YET IMPLEMENTED`"),
-    subject_prefix: Optional[str] = Query(
-        None, description="`NOT YET IMPLEMENTED`"),
-    number: Optional[str] = Query(None, description="`NOT YET IMPLEMENTED`"),
+    subject_prefix: Optional[str] = Query(None),
+    number: Optional[str] = Query(None),
     limit: int = Query(
         10,
         description="The maximum number of course sections to return in the response. Max: 50",
@@ -152,18 +287,76 @@ async def get_courses(
     ),
     offset: int = Query(
         0, description="The number of course sections in the response to skip."
-    ),
-    conn: RealDictConnection = Depends(postgres_pool.get_conn)
+    )
 ):
-    courses = fetch_courses_without_sections(conn, semester_id, limit, offset)
+    return serialize(request, await read(
+        fetch_courses, semester_id, limit, offset, include_sections, trusted=FAST_SERIALIZATION,
+        title=title, subject_prefix=subject_prefix, number=number))
 
-    if include_sections:
-        populate_course_periods(conn, semester_id, courses, include_sections)
 
-    return courses
+@app.get("/{semester_id}/courses/subjects", dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)], tags=["courses"], summary="Fetch course subject prefixes", response_model=List[str], responses=MSGPACK_RESPONSES)
+async def list_course_subject_prefixes(
+    request: Request,
+    semester_id: str = Path(
+        None,
+        example="202101",
+        description="The id of the semester, determined by the Registrar.",
+    )
+):
+    """Fetch the unique course subject prefixes: e.g. BIOL, CSCI, ESCI, MATH, etc."""
+    return serialize(request, await read(fetch_course_subject_prefixes, semester_id))
 
 
-@app.get("/{semester_id}/courses/subjects", tags=["courses"], summary="Fetch course subject prefixes", response_model=List[str])
-async def list_course_subject_prefixes(conn: RealDictConnection = Depends(postgres_pool.get_conn)):
-    """Fetch the unique course subject prefixes: e.g. BIOL, CSCI, ESCI, MATH, etc."""
-    return fetch_course_subject_prefixes(conn)
+@app.get("/{semester_id}/facets", dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)], tags=["semesters"], summary="Fetch filter values", response_model=Facets, responses=MSGPACK_RESPONSES)
+async def get_facets(
+    request: Request,
+    semester_id: str = Path(
+        None,
+        example="202101",
+        description="The id of the semester, determined by the Registrar.",
+    )
+):
+    """
+    Fetch every subject prefix, instructor, period type, instruction method and credit value of the semester's
+    sections along with how many sections have each. Useful for populating filter dropdowns.
+    """
+    return serialize(request, await read(fetch_facets, semester_id))
+
+
+@app.get("/{semester_id}/rooms/free", dependencies=[Depends(rate_limit("search")), Depends(vary_on_accept)], tags=["rooms"], summary="Find free rooms", response_model=List[str], responses=MSGPACK_RESPONSES)
+async def get_free_rooms(
+    request: Request,
+    semester_id: str = Path(
+        None,
+        example="202101",
+        description="The id of the semester, determined by the Registrar.",
+    ),
+    day: int = Query(..., example=1,
+                     description="Day of week (0-Sunday)", ge=0, le=6),
+    start_time: TIME = Query(..., example="14:00",
+                             description="24-hour 0-padded hh:mm"),
+    end_time: TIME = Query(..., example="15:50",
+                           description="24-hour 0-padded hh:mm")
+):
+    """Fetch the rooms used by any section of the semester that have no periods between `start_time` and `end_time` on `day`."""
+    start_minute, end_minute = time_to_minutes(
+        start_time), time_to_minutes(end_time)
+    if start_minute >= end_minute:
+        raise HTTPException(
+            status_code=400, detail="start_time must be before end_time")
+
+    return serialize(request, await read(fetch_free_rooms, semester_id, day, start_minute, end_minute))
+
+
+@app.get("/{semester_id}/rooms/{location}", dependencies=[Depends(rate_limit("lookup")), Depends(vary_on_accept)], tags=["rooms"], summary="Fetch room occupancy", response_model=List[RoomBooking], responses=MSGPACK_RESPONSES)
+async def get_room_bookings(
+    request: Request,
+    semester_id: str = Path(
+        None,
+        example="202101",
+        description="The id of the semester, determined by the Registrar.",
+    ),
+    location: str = Path(..., example="SAGE 114")
+):
+    """Fetch the weekly occupancy of a room: every period held in it, ordered by day and start time."""
+    return serialize(request, await read(fetch_room_bookings, semester_id, location))
@@ -0,0 +1,103 @@
+"""
+Measures how long it takes to turn DB records into a response body, per 1000 course sections.
+
+Compares the default path (validated models re-validated and encoded through the endpoint's `response_model`)
+with the fast path (trusted models encoded directly by `FastJSONResponse`).
+
+Usage: python -m scripts.bench_serialization [number of sections] [repeats]
+"""
+
+import asyncio
+import sys
+import timeit
+from typing import Any, Dict, List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.models import CourseSection, CourseSectionPeriod
+from api.responses import FastJSONResponse
+
+
+def make_records(count: int) -> List[Dict[str, Any]]:
+    """Creates `count` section records shaped like rows of `course_sections`, each with two period rows."""
+    records = []
+    for i in range(count):
+        crn = str(40000 + i)
+        records.append({
+            "semester_id": "202109",
+            "course_subject_prefix": "CSCI",
+            "course_number": str(1000 + i % 3000),
+            "course_title": "INTRODUCTION TO BENCHMARKING",
+            "section_id": str(i % 20).zfill(2),
+            "crn": crn,
+            "instruction_method": "In-Person",
+            "credits": [4],
+            "max_enrollments": 150,
+            "enrollments": 148,
+            "waitlist_max": 0,
+            "waitlists": 0,
+            "textbooks_url": None,
+            "period_records": [
+                {
+                    "semester_id": "202109",
+                    "crn": crn,
+                    "type": "lecture",
+                    "start_time": "14:00",
+                    "end_time": "15:50",
+                    "instructors": ["Hanna", "Shablovsky"],
+                    "location": "SAGE 114",
+                    "days": [1, 4],
+                },
+                {
+                    "semester_id": "202109",
+                    "crn": crn,
+                    "type": "recitation",
+                    "start_time": "10:00",
+                    "end_time": "10:50",
+                    "instructors": ["Hanna"],
+                    "location": "LOW 4050",
+                    "days": [3],
+                },
+            ],
+        })
+    return records
+
+
+def build_sections(records: List[Dict[str, Any]], trusted: bool) -> List[CourseSection]:
+    sections = []
+    for record in records:
+        record = dict(record)
+        period_records = record.pop("period_records")
+        periods = [CourseSectionPeriod.from_record(
+            period_record, trusted) for period_record in period_records]
+        sections.append(CourseSection.from_record(record, periods, trusted))
+    return sections
+
+
+response_field = create_response_field(
+    name="Response_bench", type_=List[CourseSection])
+
+
+def default_path(records: List[Dict[str, Any]]) -> bytes:
+    sections = build_sections(records, trusted=False)
+    content = asyncio.run(serialize_response(
+        field=response_field, response_content=sections))
+    return FastJSONResponse(content).body
+
+
+def fast_path(records: List[Dict[str, Any]]) -> bytes:
+    sections = build_sections(records, trusted=True)
+    return FastJSONResponse(sections).body
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    records = make_records(count)
+
+    assert default_path(records) == fast_path(records), "Fast path changed the response body!"
+
+    for name, path in [("default", default_path), ("fast", fast_path)]:
+        best = min(timeit.repeat(lambda: path(records), number=1, repeat=repeats))
+        print(f"{name:>8}: {best * 1000 / count * 1000:8.2f} ms per 1k sections")
@@ -0,0 +1,53 @@
+"""
+Scrapes course descriptions, prerequisites and credits from the course catalog into `catalog_courses`.
+
+Every course page is downloaded, but only courses whose content hash changed since the last run are parsed and
+stored again, so reruns mostly just confirm nothing changed.
+
+Usage: python -m scripts.catalog <catalog id (catoid)> <course index id (navoid)>
+"""
+
+import os
+import sys
+
+from api.db import PostgresPoolWrapper, fetch_catalog_hashes, update_catalog_course
+from api.parser.catalog import Catalog
+
+if len(sys.argv) != 3:
+    print(__doc__)
+    exit(1)
+
+catalog_id, navigation_id = sys.argv[1:]
+
+postgres_pool = PostgresPoolWrapper(
+    postgres_dsn=os.environ["POSTGRES_DSN"], min_connections=1, max_connections=1)
+postgres_pool.init()
+with postgres_pool.connection() as conn:
+    content_hashes = fetch_catalog_hashes(conn)
+    catalog = Catalog()
+    updated, unchanged, failed = 0, 0, 0
+    for subject_prefix, number, url in catalog.iter_course_links(catalog_id, navigation_id):
+        page = catalog.fetch_course_page(url)
+        content_hash = Catalog.content_hash(page)
+        if content_hash is None:
+            print(f"No course found for {subject_prefix} {number} at {url}")
+            failed += 1
+            continue
+
+        if content_hashes.get((subject_prefix, number)) == content_hash:
+            unchanged += 1
+            continue
+
+        course = Catalog.parse_course_page(page)
+        if course is None:
+            print(f"Failed to parse {subject_prefix} {number} at {url}")
+            failed += 1
+            continue
+
+        update_catalog_course(conn, course, url, content_hash)
+        conn.commit()
+        updated += 1
+
+    print(f"Updated {updated} courses, {unchanged} unchanged, {failed} failed")
+
+postgres_pool.cleanup()
@@ -1,8 +1,11 @@
 from api.db import PostgresPoolWrapper, update_course_sections
+from api.instrumentation import IMPORT_STAGE_DURATION
+from prometheus_client import REGISTRY, push_to_gateway
 import os
 import sys
 from api.parser.sis import SIS
 from api.parser.registrar import Registrar
+from api.parser.utils import prefetch
 
 if len(sys.argv) == 1:
     print("Pass semester ids to import as command line arguments")
@@ -12,16 +15,28 @@ postgres_pool = PostgresPoolWrapper(
     postgres_dsn=os.environ["POSTGRES_DSN"])
 postgres_pool.init()
 
-conn = next(postgres_pool.get_conn())
-sis = SIS(os.environ["SIS_RIN"], os.environ["SIS_PIN"], )
-if sis.login():
-    print("Logged in to SIS")
-    for semester_id in sys.argv[1:]:
-        period_types = Registrar.parse_period_types(semester_id)
-        print("Importing schedule for", semester_id)
-        course_sections = sis.fetch_course_sections(
-            semester_id, period_types=period_types)
-        update_course_sections(conn, semester_id, course_sections)
-else:
-    print("Failed to log into SIS")
-    exit(1)
+with postgres_pool.connection() as conn:
+    sis = SIS(os.environ["SIS_RIN"], os.environ["SIS_PIN"], )
+    if sis.login():
+        print("Logged in to SIS")
+        for semester_id in sys.argv[1:]:
+            period_types = Registrar.parse_period_types(semester_id)
+            print("Importing schedule for", semester_id)
+            # Keep parsing sections in the background while the previous batch is written
+            course_sections = prefetch(sis.iter_course_sections(
+                semester_id, period_types=period_types), 1000)
+            update_course_sections(conn, semester_id, course_sections)
+    else:
+        print("Failed to log into SIS")
+        exit(1)
+
+# Report how long each stage took in total
+for metric in IMPORT_STAGE_DURATION.collect():
+    for sample in metric.samples:
+        if sample.name.endswith("_sum"):
+            print(f"{sample.labels['stage']}: {sample.value:.2f}s")
+
+# The importer doesn't live long enough to be scraped, so push its metrics instead
+if "PROMETHEUS_PUSHGATEWAY" in os.environ:
+    push_to_gateway(os.environ["PROMETHEUS_PUSHGATEWAY"],
+                    job="orca_import", registry=REGISTRY)
@@ -0,0 +1,209 @@
+"""
+Load testing harness for the API.
+
+Load a synthetic semester into the (local!) database pointed to by POSTGRES_DSN:
+    python -m scripts.loadtest load 209901 --scale 10
+
+Drive a mixed workload against every endpoint of a running server and report throughput,
+p50/p95/p99 latency and DB queries per request for each endpoint:
+    python -m scripts.loadtest run 209901 --url http://localhost:8000 --duration 30 --concurrency 16
+
+All load comes from one IP, so run the server with rate limiting disabled
+(RATE_LIMIT_LOOKUP=0 RATE_LIMIT_SEARCH=0 RATE_LIMIT_BULK=0) unless that is what's being tested.
+"""
+
+import argparse
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from scripts.synthetic import generate_semester
+
+
+def load(semester_id: str, scale: float, seed: int):
+    # Imported here since the database is only needed to load, not to run
+    from api.db import PostgresPoolWrapper, update_course_sections
+    from scripts.migrate import migrate
+
+    print(f"Generating semester {semester_id} at {scale}x scale...", flush=True)
+    course_sections = generate_semester(semester_id, scale, seed)
+
+    postgres_pool = PostgresPoolWrapper(
+        postgres_dsn=os.environ["POSTGRES_DSN"], min_connections=1, max_connections=1)
+    postgres_pool.init()
+    with postgres_pool.connection() as conn:
+        migrate(conn)
+
+        c = conn.cursor()
+        c.execute(
+            "INSERT INTO semesters (semester_id, title, start_end) VALUES (%s, %s, daterange(%s, %s)) "
+            "ON CONFLICT (semester_id) DO NOTHING",
+            (semester_id, f"Synthetic {scale}x", "2099-01-01", "2099-05-01"),
+        )
+        update_course_sections(conn, semester_id, course_sections)
+
+    postgres_pool.cleanup()
+
+
+class Workload:
+    """The mix of requests made against the API, weighted roughly like real client traffic."""
+
+    def __init__(self, semester_id: str, scale: float, seed: int):
+        self.semester_id = semester_id
+        self.rng = random.Random(seed)
+
+        # Use the same generator the semester was loaded with to know which values exist
+        sections = generate_semester(semester_id, scale, seed)
+        self.crns = [
+            section.crn for section in sections if len(section.crn) == 5]
+        self.subjects = sorted(
+            {section.course_subject_prefix for section in sections})
+        self.course_numbers = sorted(
+            {section.course_number for section in sections})
+        self.courses = sorted(
+            {(section.course_subject_prefix, section.course_number) for section in sections})
+        self.instructors = sorted(
+            {instructor for section in sections for period in section.periods for instructor in period.instructors})
+        self.locations = sorted(
+            {period.location for section in sections for period in section.periods if period.location})
+
+        self.requests: List[Tuple[str, int, Callable[[], Tuple[str, Dict]]]] = [
+            ("semesters", 2, lambda: ("/semesters", {})),
+            ("courses/{prefix}-{number}", 8, self._catalog_course),
+            ("sections", 30, lambda: (f"/{self.semester_id}/sections",
+                                      {"crns": self.rng.sample(self.crns, self.rng.randint(1, 8))})),
+            ("sections/search", 25, self._search),
+            ("courses", 20, lambda: (f"/{self.semester_id}/courses",
+                                     {"offset": self.rng.choice([0, 0, 0, 10, 20, 100]), "limit": 50})),
+            ("courses?include_sections", 10, lambda: (f"/{self.semester_id}/courses",
+                                                      {"include_sections": True, "limit": 10})),
+            ("courses/subjects", 13, lambda: (f"/{self.semester_id}/courses/subjects", {})),
+            ("facets", 5, lambda: (f"/{self.semester_id}/facets", {})),
+            # Instructor names are typed, so search by prefixes of them
+            ("instructors/sections", 5, lambda: (
+                f"/{self.semester_id}/instructors/{self.rng.choice(self.instructors)[:self.rng.randint(2, 8)]}/sections",
+                {"limit": 20})),
+            ("rooms/free", 3, self._free_rooms),
+            ("rooms/{location}", 3, lambda: (f"/{self.semester_id}/rooms/{self.rng.choice(self.locations)}", {})),
+        ]
+
+    def _catalog_course(self) -> Tuple[str, Dict]:
+        subject_prefix, number = self.rng.choice(self.courses)
+        return (f"/courses/{subject_prefix}-{number}", {})
+
+    def _search(self) -> Tuple[str, Dict]:
+        params = {"limit": 50}
+        if self.rng.random() < 0.7:
+            params["course_subject_prefix"] = self.rng.choice(self.subjects)
+        if self.rng.random() < 0.3:
+            params["course_number"] = self.rng.choice(self.course_numbers)
+        if self.rng.random() < 0.3:
+            params["course_title"] = self.rng.choice(["INTRO", "DATA", "LAB", "THEORY"])
+        if self.rng.random() < 0.5:
+            params["has_seats"] = self.rng.choice([True, False])
+        if self.rng.random() < 0.2:
+            params["days"] = self.rng.choice([[1, 4], [2, 5], [1, 3, 4], [1, 2, 3, 4, 5]])
+        if self.rng.random() < 0.2:
+            params["start_time"] = self.rng.choice(["09:00", "10:00", "12:00"])
+        return (f"/{self.semester_id}/sections/search", params)
+
+    def _free_rooms(self) -> Tuple[str, Dict]:
+        start_hour = self.rng.randint(8, 19)
+        return (f"/{self.semester_id}/rooms/free", {
+            "day": self.rng.randint(1, 5),
+            "start_time": f"{start_hour:02}:00",
+            "end_time": f"{start_hour + self.rng.choice([1, 2]):02}:00",
+        })
+
+    def next_request(self) -> Tuple[str, str, Dict]:
+        name, _, make_request = self.rng.choices(
+            self.requests, weights=[weight for _, weight, _ in self.requests])[0]
+        return (name, *make_request())
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run(semester_id: str, scale: float, url: str, duration: float, concurrency: int, seed: int):
+    workload = Workload(semester_id, scale, seed)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    query_counts: Dict[str, List[int]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            with lock:
+                name, path, params = workload.next_request()
+
+            start = time.perf_counter()
+            try:
+                response = session.get(url + path, params=params)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                response, ok = None, False
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+                if response is not None and "X-Query-Count" in response.headers:
+                    query_counts[name].append(
+                        int(response.headers["X-Query-Count"]))
+
+    print(f"Running for {duration}s with {concurrency} concurrent clients against {url}...", flush=True)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+
+    print(f"{'endpoint':<26}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+    for name, _, _ in workload.requests:
+        values = sorted(latencies[name])
+        counts = query_counts[name]
+        print(
+            f"{name:<26}{len(values):>9}{errors[name]:>8}{len(values) / duration:>9.1f}"
+            f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+            f"{percentile(values, 99) * 1000:>9.1f}"
+            f"{(sum(counts) / len(counts) if counts else 0):>9.1f}"
+        )
+    total = sum(map(len, latencies.values()))
+    print(f"{'total':<26}{total:>9}{sum(errors.values()):>8}{total / duration:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load", help="Load a synthetic semester into the database")
+    load_parser.add_argument("semester_id")
+    load_parser.add_argument("--scale", type=float, default=1, help="Size relative to an RPI semester (1, 10, 100, ...)")
+    load_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = subparsers.add_parser("run", help="Drive a mixed workload against a running server")
+    run_parser.add_argument("semester_id")
+    run_parser.add_argument("--scale", type=float, default=1, help="Scale the semester was loaded with")
+    run_parser.add_argument("--url", default="http://localhost:8000")
+    run_parser.add_argument("--duration", type=float, default=30, help="Seconds to run for")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent clients")
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "load":
+        load(args.semester_id, args.scale, args.seed)
+    else:
+        run(args.semester_id, args.scale, args.url, args.duration, args.concurrency, args.seed)
@@ -0,0 +1,81 @@
+"""
+Applies the database migrations in `sql/migrations` that haven't been applied yet, in order.
+
+Each migration runs in its own transaction and is recorded in `schema_migrations` once it succeeds.
+
+Usage: python -m scripts.migrate [--list]
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+from psycopg2.extras import RealDictConnection
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "sql" / "migrations"
+
+
+def list_migrations() -> List[Tuple[str, Path]]:
+    """The (version, path) of every migration file, e.g. `("0001", .../0001_initial.sql)`, in order."""
+    return sorted(
+        (path.name.split("_", 1)[0], path) for path in MIGRATIONS_DIR.glob("*.sql")
+    )
+
+
+def applied_migrations(conn: RealDictConnection) -> List[str]:
+    c = conn.cursor()
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    conn.commit()
+    c.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [record["version"] for record in c.fetchall()]
+
+
+def migrate(conn: RealDictConnection) -> List[str]:
+    """Applies all pending migrations and returns the names of the ones applied."""
+    applied = set(applied_migrations(conn))
+    c = conn.cursor()
+
+    newly_applied = []
+    for version, path in list_migrations():
+        if version in applied:
+            continue
+
+        print(f"Applying {path.name}...", flush=True)
+        try:
+            c.execute(path.read_text())
+            c.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, path.name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        newly_applied.append(path.name)
+
+    return newly_applied
+
+
+if __name__ == "__main__":
+    from api.db import PostgresPoolWrapper
+
+    postgres_pool = PostgresPoolWrapper(
+        postgres_dsn=os.environ["POSTGRES_DSN"], min_connections=1, max_connections=1)
+    postgres_pool.init()
+    with postgres_pool.connection() as conn:
+        if "--list" in sys.argv[1:]:
+            applied = set(applied_migrations(conn))
+            for version, path in list_migrations():
+                print(f"[{'x' if version in applied else ' '}] {path.name}")
+        else:
+            names = migrate(conn)
+            print(f"Applied {len(names)} migrations" if names else "Already up to date")
+
+    postgres_pool.cleanup()
@@ -0,0 +1,115 @@
+"""
+Generates a realistic synthetic semester of course sections for benchmarking and load testing.
+
+A scale of 1 is roughly the size of an RPI semester (~55 subjects, ~3800 sections, ~5800 periods), 10 and 100
+are what it would look like for a school ten or a hundred times bigger. Note that past ~90k sections the generated
+CRNs no longer fit the 5 digits the `/sections` endpoint accepts.
+"""
+
+import random
+from typing import List
+
+from api.models import ClassTypeEnum, CourseSection, CourseSectionPeriod
+
+SUBJECTS = [
+    "ADMN", "ARCH", "ARTS", "ASTR", "BCBP", "BIOL", "BMED", "CHEM", "CHME", "CIVL",
+    "COGS", "COMM", "CSCI", "ECON", "ECSE", "ENGR", "ENVE", "ERTH", "ESCI", "GSAS",
+    "IHSS", "ISCI", "ISYE", "ITWS", "LANG", "LGHT", "LITR", "MANE", "MATH", "MATP",
+    "MGMT", "MTLE", "NSST", "PHIL", "PHYS", "PSYC", "STSO", "USAF", "USAR", "USNA",
+    "WRIT", "ACCT", "BUSN", "FINC", "GSYS", "EMAC", "NUCL", "DSES", "EPOW", "IENV",
+    "ILEA", "INQR", "MUSC", "STSH", "GAME",
+]
+
+WORDS = [
+    "INTRODUCTION", "TO", "ADVANCED", "TOPICS", "IN", "DATA", "STRUCTURES", "ALGORITHMS",
+    "CALCULUS", "BIOLOGY", "CHEMISTRY", "PHYSICS", "DESIGN", "SYSTEMS", "ANALYSIS",
+    "THEORY", "LAB", "SEMINAR", "MODELING", "ENGINEERING", "ECONOMICS", "HISTORY", "ETHICS",
+]
+
+BUILDINGS = ["DCC", "SAGE", "LOW", "WALK", "CARNEGIE", "AMOS EATON", "PITTSBURGH", "JEC", "TROY", "RICKETTS"]
+
+LAST_NAMES = [
+    "Hanna", "Shablovsky", "Goldschmidt", "Cutler", "Turner", "Holzbauer", "Kuruzovich", "Varela",
+    "Milanova", "Yener", "Stewart", "Magdon-Ismail", "Slota", "Anshelevich", "Xia", "Mitchell",
+    "Bennett", "Schwartz", "Lim", "Chen", "Patel", "Nguyen", "Kim", "Garcia", "Smith",
+]
+
+# (days, start time, end time) slots sections are commonly scheduled in
+TIME_SLOTS = [
+    ([1, 4], "08:00", "09:50"), ([1, 4], "10:00", "11:50"), ([1, 4], "12:00", "13:50"),
+    ([1, 4], "14:00", "15:50"), ([1, 4], "16:00", "17:50"), ([2, 5], "08:00", "09:50"),
+    ([2, 5], "10:00", "11:50"), ([2, 5], "12:00", "13:50"), ([2, 5], "14:00", "15:50"),
+    ([1, 3, 4], "10:00", "10:50"), ([1, 3, 4], "11:00", "11:50"), ([3], "18:00", "19:50"),
+    ([2], "09:00", "10:50"), ([5], "12:00", "13:50"),
+]
+
+SUBJECTS_PER_SCALE = 55
+COURSES_PER_SUBJECT = 18
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.sample(WORDS, rng.randint(2, 5)))
+
+
+def _period(rng: random.Random, semester_id: str, crn: str, type: ClassTypeEnum) -> CourseSectionPeriod:
+    days, start_time, end_time = rng.choice(TIME_SLOTS)
+    return CourseSectionPeriod(
+        semester_id=semester_id,
+        crn=crn,
+        type=type,
+        start_time=start_time,
+        end_time=end_time,
+        instructors=rng.sample(LAST_NAMES, rng.choice([1, 1, 1, 2])),
+        location=f"{rng.choice(BUILDINGS)} {rng.randint(1, 5)}{rng.randint(0, 99):02}",
+        days=days,
+    )
+
+
+def generate_semester(semester_id: str, scale: float = 1, seed: int = 0) -> List[CourseSection]:
+    """Generates the course sections (with periods) of a synthetic semester, deterministic for a given seed."""
+    rng = random.Random(seed)
+
+    subject_count = max(1, round(SUBJECTS_PER_SCALE * scale))
+    subjects = [
+        SUBJECTS[i % len(SUBJECTS)] + (str(i // len(SUBJECTS))
+                                       if i >= len(SUBJECTS) else "")
+        for i in range(subject_count)
+    ]
+
+    sections = []
+    crn = 10000
+    for subject in subjects:
+        course_numbers = rng.sample(
+            range(1000, 7000), rng.randint(COURSES_PER_SUBJECT // 2, COURSES_PER_SUBJECT * 2))
+        for number in sorted(course_numbers):
+            title = _title(rng)
+            credits = rng.choice([[4], [4], [4], [3], [1], [0], [1, 2, 3, 4]])
+            for section_number in range(1, rng.choice([1, 1, 1, 2, 2, 3, 5, 8]) + 1):
+                crn += 1
+                max_enrollments = rng.choice([15, 25, 30, 40, 60, 100, 150, 300])
+                section = CourseSection(
+                    semester_id=semester_id,
+                    course_subject_prefix=subject,
+                    course_number=str(number),
+                    course_title=title,
+                    section_id=str(section_number).zfill(2),
+                    crn=str(crn),
+                    instruction_method=rng.choice([None, "In-Person", "Hybrid", "Online"]),
+                    credits=credits,
+                    max_enrollments=max_enrollments,
+                    enrollments=rng.randint(0, max_enrollments),
+                    waitlist_max=rng.choice([0, 0, 10]),
+                    waitlists=0,
+                    periods=[],
+                )
+
+                section.periods.append(_period(rng, semester_id, section.crn, ClassTypeEnum.LECTURE))
+                if rng.random() < 0.3:
+                    section.periods.append(_period(rng, semester_id, section.crn, ClassTypeEnum.RECITATION))
+                if rng.random() < 0.15:
+                    section.periods.append(_period(rng, semester_id, section.crn, ClassTypeEnum.LAB))
+                if rng.random() < 0.1:
+                    section.periods.append(_period(rng, semester_id, section.crn, ClassTypeEnum.TEST))
+                sections.append(section)
+
+    return sections
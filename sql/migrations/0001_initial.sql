@@ -0,0 +1,35 @@
+-- The original schema the API was deployed with (https://dbdiagram.io/d/5fbb43a63a78976d7b7cfb03).
+-- Databases created before migrations existed already have these tables, so nothing is changed for them.
+CREATE TABLE IF NOT EXISTS semesters (
+    semester_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    start_end DATERANGE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS course_sections (
+    semester_id TEXT NOT NULL,
+    course_subject_prefix TEXT NOT NULL,
+    course_number TEXT NOT NULL,
+    course_title TEXT NOT NULL,
+    section_id TEXT NOT NULL,
+    crn TEXT NOT NULL,
+    instruction_method TEXT,
+    credits INTEGER[] NOT NULL,
+    max_enrollments INTEGER NOT NULL,
+    enrollments INTEGER NOT NULL,
+    waitlist_max INTEGER NOT NULL,
+    waitlists INTEGER NOT NULL,
+    textbooks_url TEXT,
+    PRIMARY KEY (semester_id, crn)
+);
+
+CREATE TABLE IF NOT EXISTS course_section_periods (
+    semester_id TEXT NOT NULL,
+    crn TEXT NOT NULL,
+    type TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    instructors TEXT[] NOT NULL,
+    location TEXT,
+    days INTEGER[] NOT NULL
+);
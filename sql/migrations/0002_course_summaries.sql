@@ -0,0 +1,44 @@
+-- Course-level summary of each semester's sections, refreshed by every import (see `refresh_course_summaries`).
+-- `/courses` reads from this table instead of grouping every section of the semester on each request.
+CREATE TABLE IF NOT EXISTS course_summaries (
+    semester_id TEXT NOT NULL,
+    subject_prefix TEXT NOT NULL,
+    number TEXT NOT NULL,
+    title TEXT NOT NULL,
+    section_count INTEGER NOT NULL,
+    total_seats INTEGER NOT NULL,
+    open_seats INTEGER NOT NULL,
+    min_credits INTEGER,
+    max_credits INTEGER,
+    period_types TEXT[] NOT NULL DEFAULT '{}',
+    PRIMARY KEY (semester_id, subject_prefix, number, title)
+);
+
+CREATE INDEX IF NOT EXISTS course_summaries_number_idx
+    ON course_summaries (semester_id, number);
+
+-- Summarize the semesters imported before this table existed
+WITH sections AS (
+    SELECT s.*,
+        (SELECT MIN(c) FROM UNNEST(s.credits) AS c) AS min_credits,
+        (SELECT MAX(c) FROM UNNEST(s.credits) AS c) AS max_credits
+    FROM course_sections s
+), course_period_types AS (
+    SELECT s.semester_id, s.course_subject_prefix, s.course_number, s.course_title,
+        ARRAY_AGG(DISTINCT p.type::TEXT ORDER BY p.type::TEXT) AS period_types
+    FROM course_sections s
+    JOIN course_section_periods p ON p.semester_id = s.semester_id AND p.crn = s.crn
+    WHERE p.type IS NOT NULL
+    GROUP BY s.semester_id, s.course_subject_prefix, s.course_number, s.course_title
+)
+INSERT INTO course_summaries (
+    semester_id, subject_prefix, number, title, section_count,
+    total_seats, open_seats, min_credits, max_credits, period_types
+)
+SELECT s.semester_id, s.course_subject_prefix, s.course_number, s.course_title, COUNT(*),
+    SUM(s.max_enrollments), SUM(GREATEST(s.max_enrollments - s.enrollments, 0)),
+    MIN(s.min_credits), MAX(s.max_credits), COALESCE(t.period_types, '{}')
+FROM sections s
+LEFT JOIN course_period_types t USING (semester_id, course_subject_prefix, course_number, course_title)
+GROUP BY s.semester_id, s.course_subject_prefix, s.course_number, s.course_title, t.period_types
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,36 @@
+-- Distinct values (with section counts) of the fields clients filter on, per semester.
+-- Refreshed by every import (see `refresh_semester_facets`) and served by `/{semester_id}/facets`.
+CREATE TABLE IF NOT EXISTS semester_facets (
+    semester_id TEXT NOT NULL,
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (semester_id, facet, value)
+);
+
+-- Fill in the semesters imported before this table existed
+INSERT INTO semester_facets (semester_id, facet, value, count)
+SELECT semester_id, 'subject_prefixes', course_subject_prefix, COUNT(*)
+FROM course_sections
+GROUP BY semester_id, course_subject_prefix
+UNION ALL
+SELECT semester_id, 'instruction_methods', instruction_method, COUNT(*)
+FROM course_sections WHERE instruction_method IS NOT NULL
+GROUP BY semester_id, instruction_method
+UNION ALL
+SELECT semester_id, 'credits', c::TEXT, COUNT(*)
+FROM course_sections, UNNEST(credits) AS c
+GROUP BY semester_id, c
+UNION ALL
+SELECT semester_id, 'period_types', type::TEXT, COUNT(DISTINCT crn)
+FROM course_section_periods WHERE type IS NOT NULL
+GROUP BY semester_id, type
+UNION ALL
+SELECT semester_id, 'instructors', i, COUNT(DISTINCT crn)
+FROM course_section_periods, UNNEST(instructors) AS i
+GROUP BY semester_id, i
+UNION ALL
+SELECT semester_id, 'locations', location, COUNT(DISTINCT crn)
+FROM course_section_periods WHERE location IS NOT NULL
+GROUP BY semester_id, location
+ON CONFLICT DO NOTHING;
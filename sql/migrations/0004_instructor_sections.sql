@@ -0,0 +1,18 @@
+-- Inverted index from instructor to the sections they teach, per semester.
+-- Refreshed by every import (see `refresh_instructor_sections`) and served by `/{semester_id}/instructors/{name}/sections`.
+CREATE TABLE IF NOT EXISTS instructor_sections (
+    semester_id TEXT NOT NULL,
+    instructor TEXT NOT NULL,
+    crn TEXT NOT NULL,
+    PRIMARY KEY (semester_id, instructor, crn)
+);
+
+-- Case-insensitive prefix search: LOWER(instructor) LIKE 'prefix%'
+CREATE INDEX IF NOT EXISTS instructor_sections_prefix_idx
+    ON instructor_sections (semester_id, LOWER(instructor) text_pattern_ops);
+
+-- Index the semesters imported before this table existed
+INSERT INTO instructor_sections (semester_id, instructor, crn)
+SELECT DISTINCT semester_id, i, crn
+FROM course_section_periods, UNNEST(instructors) AS i
+ON CONFLICT DO NOTHING;
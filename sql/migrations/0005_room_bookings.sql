@@ -0,0 +1,28 @@
+-- When every room is booked: one row per period per day it meets, with times in minutes since midnight.
+-- Refreshed by every import (see `refresh_room_bookings`) and served by the `/{semester_id}/rooms` endpoints.
+CREATE TABLE IF NOT EXISTS room_bookings (
+    semester_id TEXT NOT NULL,
+    location TEXT NOT NULL,
+    day SMALLINT NOT NULL,
+    start_minute SMALLINT NOT NULL,
+    end_minute SMALLINT NOT NULL,
+    crn TEXT NOT NULL
+);
+
+-- A room's weekly occupancy
+CREATE INDEX IF NOT EXISTS room_bookings_location_idx
+    ON room_bookings (semester_id, location, day, start_minute);
+
+-- Bookings overlapping a time window on a day: start_minute < window end AND end_minute > window start
+CREATE INDEX IF NOT EXISTS room_bookings_day_idx
+    ON room_bookings (semester_id, day, start_minute, end_minute, location);
+
+-- Fill in the semesters imported before this table existed
+INSERT INTO room_bookings (semester_id, location, day, start_minute, end_minute, crn)
+SELECT semester_id, location, d,
+    SPLIT_PART(start_time, ':', 1)::INT * 60 + SPLIT_PART(start_time, ':', 2)::INT,
+    SPLIT_PART(end_time, ':', 1)::INT * 60 + SPLIT_PART(end_time, ':', 2)::INT,
+    crn
+FROM course_section_periods, UNNEST(days) AS d
+WHERE location IS NOT NULL AND start_time IS NOT NULL AND end_time IS NOT NULL
+    AND semester_id NOT IN (SELECT DISTINCT semester_id FROM room_bookings);
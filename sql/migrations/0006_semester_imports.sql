@@ -0,0 +1,12 @@
+-- History of successful imports per semester (see `record_import`).
+-- Each import is validated against the previous one's counts before it replaces the live data.
+CREATE TABLE IF NOT EXISTS semester_imports (
+    import_id SERIAL PRIMARY KEY,
+    semester_id TEXT NOT NULL,
+    section_count INTEGER NOT NULL,
+    period_count INTEGER NOT NULL,
+    imported_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS semester_imports_semester_idx
+    ON semester_imports (semester_id, import_id DESC);
@@ -0,0 +1,54 @@
+-- Partition course sections and periods by semester so every query (all filter by semester_id) only
+-- touches its semester's partition, imports can swap a whole semester in at once (see `update_course_sections`)
+-- and old semesters can be detached/dropped without touching the others.
+ALTER TABLE course_sections RENAME TO course_sections_unpartitioned;
+ALTER TABLE course_section_periods RENAME TO course_section_periods_unpartitioned;
+
+CREATE TABLE course_sections (LIKE course_sections_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY LIST (semester_id);
+CREATE TABLE course_section_periods (LIKE course_section_periods_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY LIST (semester_id);
+
+-- Partitions are named <table>_<semester_id>, e.g. course_sections_202101
+DO $$
+DECLARE
+    semester TEXT;
+BEGIN
+    FOR semester IN
+        SELECT semester_id FROM course_sections_unpartitioned
+        UNION
+        SELECT semester_id FROM course_section_periods_unpartitioned
+    LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF course_sections FOR VALUES IN (%L)',
+            'course_sections_' || semester, semester);
+        EXECUTE format('CREATE TABLE %I PARTITION OF course_section_periods FOR VALUES IN (%L)',
+            'course_section_periods_' || semester, semester);
+    END LOOP;
+END $$;
+
+INSERT INTO course_sections SELECT * FROM course_sections_unpartitioned;
+INSERT INTO course_section_periods SELECT * FROM course_section_periods_unpartitioned;
+
+DROP TABLE course_sections_unpartitioned;
+DROP TABLE course_section_periods_unpartitioned;
+
+-- fetch_course_sections: semester_id = ? AND crn IN (...)
+ALTER TABLE course_sections ADD PRIMARY KEY (semester_id, crn);
+
+-- search_course_sections/populate_course_periods: semester_id = ? [AND course_subject_prefix = ? [AND course_number = ?]]
+-- ORDER BY course_subject_prefix, course_number[, section_id]
+CREATE INDEX course_sections_course_idx
+    ON course_sections (semester_id, course_subject_prefix, course_number, section_id);
+
+-- search_course_sections: semester_id = ? AND course_number = ?
+CREATE INDEX course_sections_number_idx
+    ON course_sections (semester_id, course_number);
+
+-- search_course_sections: course_title ILIKE '%...%'
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX course_sections_title_trgm_idx
+    ON course_sections USING GIN (course_title gin_trgm_ops);
+
+-- fetch_course_sections/fetch_course_section_periods: semester_id = ? AND crn IN (...)
+CREATE INDEX course_section_periods_crn_idx
+    ON course_section_periods (semester_id, crn);
@@ -0,0 +1,30 @@
+-- One row per course across all semesters, keyed by subject and number (see `refresh_catalog_courses`).
+-- Every import links its semester to the courses it has sections of, and `python -m scripts.catalog` fills in
+-- descriptions and prerequisites from the course catalog, only reparsing courses whose page changed (`content_hash`).
+CREATE TABLE IF NOT EXISTS catalog_courses (
+    subject_prefix TEXT NOT NULL,
+    number TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    prerequisites TEXT,
+    min_credits INTEGER,
+    max_credits INTEGER,
+    semester_ids TEXT[] NOT NULL DEFAULT '{}',
+    source_url TEXT,
+    content_hash TEXT,
+    fetched_at TIMESTAMPTZ,
+    PRIMARY KEY (subject_prefix, number)
+);
+
+-- Link the semesters imported before the catalog existed
+INSERT INTO catalog_courses (subject_prefix, number, title, min_credits, max_credits, semester_ids)
+SELECT
+    subject_prefix,
+    number,
+    (ARRAY_AGG(title ORDER BY semester_id DESC))[1],
+    MIN(min_credits),
+    MAX(max_credits),
+    ARRAY_AGG(DISTINCT semester_id ORDER BY semester_id)
+FROM course_summaries
+GROUP BY subject_prefix, number
+ON CONFLICT (subject_prefix, number) DO NOTHING;
@@ -0,0 +1,17 @@
+-- Store each booking's time as a range so free room searches can use a GiST index: a B-tree on
+-- (start_minute, end_minute) can only bound one side of `start_minute < window end AND end_minute > window start`,
+-- while `minutes && window` is answered straight from the index. btree_gist lets the index also cover
+-- the semester and day equality columns.
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE room_bookings ADD COLUMN IF NOT EXISTS minutes INT4RANGE;
+
+UPDATE room_bookings SET minutes = INT4RANGE(start_minute, end_minute) WHERE minutes IS NULL;
+
+ALTER TABLE room_bookings ALTER COLUMN minutes SET NOT NULL;
+
+-- Bookings overlapping a time window on a day: minutes && window
+CREATE INDEX IF NOT EXISTS room_bookings_minutes_idx
+    ON room_bookings USING GIST (semester_id, day, minutes);
+
+DROP INDEX IF EXISTS room_bookings_day_idx;
@@ -0,0 +1,72 @@
+from api.parser.catalog import Catalog
+
+COURSE_PAGE = b"""
+<html><body>
+<div id="navigation"><a href="content.php?catoid=22">Catalog Home</a></div>
+<table><tr><td class="block_content">
+<h1 id="course_preview_title">CSCI 1100 - Computer Science I</h1><span style="display: none">Hidden</span>
+<br><br>An introduction to computer programming, <em>algorithm design</em> and analysis.<br><br>
+<strong>Prerequisites/Corequisites: </strong>Prerequisite: MATH 1010.<br><br>
+<strong>When Offered: </strong>Fall and spring terms annually.<br><br>
+<strong>Credit Hours: </strong>1 to 4<br><br>
+</td></tr></table>
+</body></html>
+"""
+
+LISTING_PAGE = b"""
+<html><body><table>
+<tr><td><a href="preview_course_nopop.php?catoid=22&amp;coid=100">CSCI 1100 - Computer Science I</a></td></tr>
+<tr><td><a href="preview_course_nopop.php?catoid=22&amp;coid=101">MATH 1010 - Calculus I</a></td></tr>
+<tr><td><a href="content.php?catoid=22&amp;navoid=500">Catalog Home</a></td></tr>
+</table></body></html>
+"""
+
+
+def test_parse_course_links():
+    assert Catalog._parse_course_links(LISTING_PAGE) == [
+        ("CSCI", "1100", "https://catalog.rpi.edu/preview_course_nopop.php?catoid=22&coid=100"),
+        ("MATH", "1010", "https://catalog.rpi.edu/preview_course_nopop.php?catoid=22&coid=101"),
+    ]
+
+
+def test_parse_course_page():
+    course = Catalog.parse_course_page(COURSE_PAGE)
+    assert course.subject_prefix == "CSCI"
+    assert course.number == "1100"
+    assert course.title == "COMPUTER SCIENCE I"
+    assert course.description == "An introduction to computer programming, algorithm design and analysis."
+    assert course.prerequisites == "Prerequisite: MATH 1010."
+    assert (course.min_credits, course.max_credits) == (1, 4)
+
+    assert Catalog.parse_course_page(LISTING_PAGE) is None
+
+
+def test_content_hash():
+    content_hash = Catalog.content_hash(COURSE_PAGE)
+    assert content_hash is not None
+
+    # Only changes to the course itself change the hash
+    assert Catalog.content_hash(COURSE_PAGE.replace(b"Catalog Home", b"Home")) == content_hash
+    assert Catalog.content_hash(COURSE_PAGE.replace(b"1 to 4", b"4")) != content_hash
+    assert Catalog.content_hash(LISTING_PAGE) is None
+
+
+def test_iter_course_links_stops_past_the_last_page():
+    class FakeResponse:
+        def __init__(self, content):
+            self.content = content
+
+    class FakeSession:
+        """Answers every page past the first with the listing again, like Acalog does past the last page."""
+
+        def __init__(self):
+            self.pages = []
+
+        def get(self, url, params=None):
+            self.pages.append(params["filter[cpage]"])
+            return FakeResponse(LISTING_PAGE)
+
+    catalog = Catalog()
+    catalog.session = FakeSession()
+    assert list(catalog.iter_course_links("22", "500")) == Catalog._parse_course_links(LISTING_PAGE)
+    assert catalog.session.pages == [1, 2]
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from api.coalesce import InFlightLimit, SingleFlight
+
+
+def test_single_flight_coalesces_identical_calls():
+    single_flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch(semester_id, crns):
+        calls.append((semester_id, crns))
+        release.wait(5)
+        return [semester_id, *crns]
+
+    async def main():
+        requests = [
+            asyncio.ensure_future(single_flight.run("fetch", fetch, "202101", ["42608", "42609"])),
+            asyncio.ensure_future(single_flight.run("fetch", fetch, "202101", ["42608", "42609"])),
+            asyncio.ensure_future(single_flight.run("fetch", fetch, "202109", ["42608", "42609"])),
+        ]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    results = asyncio.run(main())
+    assert results == [["202101", "42608", "42609"]] * 2 + [["202109", "42608", "42609"]]
+    assert sorted(calls) == [("202101", ["42608", "42609"]), ("202109", ["42608", "42609"])]
+    assert single_flight.calls == {}
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    single_flight = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(
+            single_flight.run("fail", fail), single_flight.run("fail", fail), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+
+        # Calls aren't cached once finished
+        with pytest.raises(ValueError):
+            await single_flight.run("fail", fail)
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_in_flight_limit_turns_away_calls_that_wait_too_long():
+    single_flight = SingleFlight(InFlightLimit(1, timeout=0.05))
+    release = threading.Event()
+
+    def fetch(crn):
+        release.wait(5)
+        return crn
+
+    async def main():
+        first = asyncio.ensure_future(single_flight.run("fetch", fetch, "42608"))
+        await asyncio.sleep(0.01)
+
+        # Waits on the event loop rather than the threadpool, and only until the timeout
+        with pytest.raises(HTTPException) as error:
+            await single_flight.run("fetch", fetch, "42609")
+        assert error.value.status_code == 503
+
+        # Identical calls still share the running one without needing a slot
+        second = asyncio.ensure_future(single_flight.run("fetch", fetch, "42608"))
+        release.set()
+        assert await asyncio.gather(first, second) == ["42608", "42608"]
+
+        # The slot is free again
+        assert await single_flight.run("fetch", fetch, "42609") == "42609"
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import gzip
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from api.compression import CompressionMiddleware, compress, negotiate_encoding, supported_encodings
+from api.responses import parse_accept, serialize, wants_msgpack
+
+
+def test_parse_accept():
+    assert parse_accept("gzip, br;q=0.5") == {"gzip": 1.0, "br": 0.5}
+    assert parse_accept("application/msgpack;q=0.9, */*;q=0.1") == {
+        "application/msgpack": 0.9, "*/*": 0.1}
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("*") == supported_encodings()[0]
+    if "br" in supported_encodings():
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+        assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_gzip_round_trip():
+    body = b'{"crn":"42608"}' * 100
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+def test_wants_msgpack():
+    assert not wants_msgpack(None)
+    assert not wants_msgpack("application/json")
+    assert not wants_msgpack("application/msgpack;q=0.5, application/json")
+    assert wants_msgpack("application/msgpack")
+    assert wants_msgpack("application/x-msgpack, */*;q=0.8")
+
+
+def test_vary_accept_encoding():
+    client = TestClient(CompressionMiddleware(
+        PlainTextResponse("x" * 1000), minimum_size=500))
+
+    # Responses that could have been encoded differently say so, whether or not they were compressed
+    for accept_encoding in ("identity", "gzip"):
+        response = client.get("/", headers={"Accept-Encoding": accept_encoding})
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    small_client = TestClient(CompressionMiddleware(
+        PlainTextResponse("x"), minimum_size=500))
+    assert small_client.get("/", headers={"Accept-Encoding": "gzip"}).headers["vary"] == "Accept-Encoding"
+
+
+def test_serialize_vary_accept():
+    request = Request({"type": "http", "headers": [
+                      (b"accept", b"application/msgpack")]})
+    assert serialize(request, {"crn": "42608"}).headers["vary"] == "Accept"
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+# api.db reads its configuration at import, but never connects until `init`
+os.environ.setdefault("POSTGRES_DSN", "postgres://localhost/test")
+os.environ.setdefault("MIN_DB_CONNECTIONS", "1")
+os.environ.setdefault("MAX_DB_CONNECTIONS", "1")
+
+from api.db import ImportValidationError, update_course_sections  # noqa: E402
+
+
+class FakeCursor:
+    """Answers the import's queries as if `staged` (sections, periods) were staged after `previous_sections`."""
+
+    def __init__(self, staged, previous_sections):
+        self.counts = list(staged)
+        self.previous_sections = previous_sections
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(str(query))
+
+    def fetchone(self):
+        query = self.queries[-1]
+        if "COUNT(*)" in query:
+            return {"count": self.counts.pop(0)}
+        if "FROM semester_imports" in query:
+            return None if self.previous_sections is None else {"section_count": self.previous_sections}
+        if "to_regclass" in query:
+            return {"exists": True}
+        return {"import_id": 1}
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.events = []
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+
+def _import(staged, previous_sections):
+    conn = FakeConnection(FakeCursor(staged, previous_sections))
+    update_course_sections(conn, "202101", [])
+    return conn
+
+
+@pytest.mark.parametrize("staged,previous_sections", [
+    # Nothing scraped
+    ((0, 0), None),
+    ((0, 0), 1000),
+    # Far fewer sections than last time
+    ((100, 150), 1000),
+])
+def test_rejected_imports_roll_back(staged, previous_sections):
+    conn = FakeConnection(FakeCursor(staged, previous_sections))
+    with pytest.raises(ImportValidationError):
+        update_course_sections(conn, "202101", [])
+
+    assert conn.events == ["rollback"]
+    # The live partitions were never touched
+    assert not any("DETACH" in query for query in conn._cursor.queries)
+
+
+@pytest.mark.parametrize("staged,previous_sections", [
+    ((1000, 1500), None),
+    ((900, 1400), 1000),
+])
+def test_valid_imports_commit(staged, previous_sections):
+    conn = _import(staged, previous_sections)
+    assert conn.events == ["commit"]
+    assert any("DETACH" in query for query in conn._cursor.queries)
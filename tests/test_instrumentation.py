@@ -0,0 +1,31 @@
+from api.instrumentation import fingerprint
+
+
+def test_fingerprint_literals():
+    assert fingerprint("SELECT * FROM \"course_sections\" WHERE \"semester_id\"='202101' AND \"crn\" IN ('42608','41340')") == \
+        "SELECT * FROM \"course_sections\" WHERE \"semester_id\"=? AND \"crn\" IN (...)"
+    assert fingerprint("SELECT * FROM course_sections LIMIT 10 OFFSET 20") == \
+        "SELECT * FROM course_sections LIMIT ? OFFSET ?"
+    assert fingerprint("SELECT 'it''s'") == "SELECT ?"
+
+
+def test_fingerprint_same_for_different_values():
+    assert fingerprint("SELECT * FROM t WHERE crn IN ('1')") == \
+        fingerprint("SELECT * FROM t WHERE crn IN ('1', '2', '3')")
+    assert fingerprint("INSERT INTO t (a,b) VALUES ('x',1),('y',2)") == \
+        fingerprint("INSERT INTO t (a,b) VALUES ('z',3)")
+    assert fingerprint("INSERT INTO t (days) VALUES (ARRAY[1,4])") == \
+        fingerprint("INSERT INTO t (days) VALUES (ARRAY[2])")
+
+
+def test_fingerprint_collapses_any_values_row():
+    assert fingerprint(
+        "INSERT INTO t (a,b,c) VALUES ('x',NULL,ARRAY['a','b']),('y',1,ARRAY[]::TEXT[]), (lower('z'), NULL, '{}') "
+        "ON CONFLICT DO NOTHING") == "INSERT INTO t (a,b,c) VALUES (...) ON CONFLICT DO NOTHING"
+    assert fingerprint("INSERT INTO t (a,b) VALUES (NULL,ARRAY[1])") == \
+        fingerprint("INSERT INTO t (a,b) VALUES ('x',ARRAY[2,3]),(NULL,NULL)")
+
+
+def test_fingerprint_keeps_identifiers():
+    assert fingerprint("SELECT * FROM course_sections_202101\n  WHERE crn=%s") == \
+        "SELECT * FROM course_sections_202101 WHERE crn=%s"
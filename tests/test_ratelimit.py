@@ -0,0 +1,66 @@
+import os
+
+from starlette.requests import Request
+
+# api.security reads the API key at import
+os.environ.setdefault("API_KEY", "test")
+
+from api.ratelimit import RateLimiter, TokenBucket, client_ip, parse_quota
+
+
+def test_parse_quota():
+    assert parse_quota("5/20") == (5, 20)
+    assert parse_quota("0.5/2") == (0.5, 2)
+    assert parse_quota("3") == (3, 3)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=3)
+    now = bucket.updated
+
+    # Bursts up to the capacity are allowed
+    assert [bucket.take(now) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(now) == 0.5
+
+    # Tokens come back at the rate
+    assert bucket.take(now + 0.5) == 0
+    assert bucket.take(now + 0.5) == 0.5
+
+
+def test_rate_limiter():
+    limiter = RateLimiter({"lookup": (1, 2), "bulk": (0, 0)}, key_multiplier=2)
+
+    assert limiter.check("lookup", "ip:1.2.3.4") == 0
+    assert limiter.check("lookup", "ip:1.2.3.4") == 0
+    assert limiter.check("lookup", "ip:1.2.3.4") > 0
+
+    # Clients and endpoint classes are limited separately
+    assert limiter.check("lookup", "ip:5.6.7.8") == 0
+
+    # Keys get a multiple of the quota
+    assert [limiter.check("lookup", "key:k", True) for _ in range(4)] == [0] * 4
+    assert limiter.check("lookup", "key:k", True) > 0
+
+    # A rate of 0 disables limiting
+    assert all(limiter.check("bulk", "ip:1.2.3.4") == 0 for _ in range(100))
+
+
+def request_from(host: str, *forwarded_for: str) -> Request:
+    return Request({
+        "type": "http",
+        "client": (host, 1234),
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded_for],
+    })
+
+
+def test_client_ip():
+    # Only the hop appended by the trusted proxy counts, whatever the client sent before it
+    assert client_ip(request_from("10.0.0.1", "1.2.3.4"), 1) == "1.2.3.4"
+    assert client_ip(request_from("10.0.0.1", "6.6.6.6, 1.2.3.4"), 1) == "1.2.3.4"
+    assert client_ip(request_from("10.0.0.1", "6.6.6.6", "1.2.3.4"), 1) == "1.2.3.4"
+    assert client_ip(request_from("10.0.0.1", "6.6.6.6, 1.2.3.4, 10.0.0.2"), 2) == "1.2.3.4"
+
+    # Without enough hops (or proxies) the connecting address is used
+    assert client_ip(request_from("10.0.0.1"), 1) == "10.0.0.1"
+    assert client_ip(request_from("10.0.0.1", "1.2.3.4"), 2) == "10.0.0.1"
+    assert client_ip(request_from("10.0.0.1", "6.6.6.6"), 0) == "10.0.0.1"
@@ -0,0 +1,128 @@
+import os
+
+import psycopg2
+import pytest
+
+# api.db reads its configuration at import, but never connects until `init`
+os.environ.setdefault("POSTGRES_DSN", "postgres://localhost/test")
+os.environ.setdefault("MIN_DB_CONNECTIONS", "1")
+os.environ.setdefault("MAX_DB_CONNECTIONS", "1")
+
+from api.db import PoolSaturatedError, PostgresPoolWrapper  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, versions):
+        self.versions = versions
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return [{"semester_id": semester_id, "import_id": import_id} for semester_id, import_id in self.versions.items()]
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return FakeCursor(self.pool.versions)
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """Hands out connections seeing `versions`, or raises `error` if set."""
+
+    def __init__(self, versions=None, error=None):
+        self.versions = versions or {}
+        self.error = error
+        self.in_use = 0
+
+    def getconn(self, timeout=None):
+        if self.error is not None:
+            raise self.error
+        self.in_use += 1
+        return FakeConnection(self)
+
+    def putconn(self, conn):
+        self.in_use -= 1
+
+
+def _wrapper(replica_pools, read_strategy="round_robin", primary_versions=None):
+    wrapper = PostgresPoolWrapper(
+        "primary", 1, 1, read_dsns=[f"replica{i}" for i in range(len(replica_pools))], read_strategy=read_strategy)
+    wrapper.postgres_pool = FakePool(primary_versions or {})
+    wrapper.read_pools = replica_pools
+    wrapper.read_in_use = [0] * len(replica_pools)
+    return wrapper
+
+
+def _reads(wrapper, semester_id, count):
+    """The pool each of `count` reads of the semester got its connection from."""
+    pools = []
+    for _ in range(count):
+        with wrapper.read_conn(semester_id) as conn:
+            pools.append(conn.pool)
+    return pools
+
+
+def test_round_robin():
+    replicas = [FakePool(), FakePool()]
+    wrapper = _wrapper(replicas)
+    assert _reads(wrapper, None, 4) == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+
+def test_least_busy():
+    replicas = [FakePool(), FakePool(), FakePool()]
+    wrapper = _wrapper(replicas, "least_busy")
+    wrapper.read_in_use = [2, 0, 1]
+    assert _reads(wrapper, None, 2) == [replicas[1], replicas[1]]
+
+
+def test_skips_replicas_behind_the_primary():
+    replicas = [FakePool({"202101": 4}), FakePool({"202101": 5})]
+    wrapper = _wrapper(replicas, primary_versions={"202101": 5})
+    assert _reads(wrapper, "202101", 3) == [replicas[1]] * 3
+
+    # Semesters without imports are up to date everywhere
+    assert set(_reads(wrapper, "202109", 2)) == set(replicas)
+
+
+def test_falls_back_to_the_primary():
+    wrapper = _wrapper([FakePool({"202101": 4})], primary_versions={"202101": 5})
+    assert _reads(wrapper, "202101", 2) == [wrapper.postgres_pool] * 2
+
+    wrapper = _wrapper([])
+    assert _reads(wrapper, "202101", 1) == [wrapper.postgres_pool]
+
+
+def test_skips_saturated_and_unreachable_replicas():
+    saturated = FakePool({"202101": 5}, PoolSaturatedError("busy"))
+    unreachable = FakePool({"202101": 5}, psycopg2.OperationalError("down"))
+    replicas = [saturated, unreachable, FakePool({"202101": 5})]
+    wrapper = _wrapper(replicas, primary_versions={"202101": 5})
+    assert _reads(wrapper, "202101", 3) == [replicas[2]] * 3
+
+    # An unreachable replica is remembered as seeing nothing until its versions expire, a busy one isn't
+    assert wrapper.import_versions[1][1] == {}
+    assert 0 not in wrapper.import_versions
+
+
+def test_releases_replicas_on_errors():
+    replicas = [FakePool()]
+    wrapper = _wrapper(replicas)
+
+    with pytest.raises(ValueError):
+        with wrapper.read_conn(None):
+            raise ValueError("query failed")
+    assert wrapper.read_in_use == [0]
+    assert replicas[0].in_use == 0
+
+    replicas[0].error = PoolSaturatedError("busy")
+    with pytest.raises(PoolSaturatedError):
+        with wrapper.read_conn(None):
+            pass
+    assert wrapper.read_in_use == [0]
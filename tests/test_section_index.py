@@ -0,0 +1,139 @@
+import pytest
+
+from api import section_index
+from api.section_index import SemesterIndex, bitmask, get_semester_index
+
+
+def _section(crn, subject="CSCI", number="1100", title="COMPUTER SCIENCE I", enrollments=10, max_enrollments=20, credits=[4]):
+    return {
+        "semester_id": "202101", "course_subject_prefix": subject, "course_number": number,
+        "course_title": title, "section_id": "01", "crn": crn, "instruction_method": None,
+        "credits": credits, "max_enrollments": max_enrollments, "enrollments": enrollments,
+        "waitlist_max": 0, "waitlists": 0, "textbooks_url": None,
+    }
+
+
+def _period(crn, days, start_time, end_time, type="lecture"):
+    return {
+        "semester_id": "202101", "crn": crn, "type": type, "start_time": start_time,
+        "end_time": end_time, "instructors": ["Hanna"], "location": "DCC 308", "days": days,
+    }
+
+
+SECTIONS = [
+    _section("10001"),
+    _section("10002", enrollments=20),
+    _section("10003", subject="MATH", number="1010", title="CALCULUS I", credits=[1, 2, 3, 4]),
+    _section("10004", subject="MATH", number="4961", title="INDEPENDENT STUDY", credits=[1, 3]),
+]
+PERIODS = [
+    _period("10001", [1, 4], "10:00", "11:50"),
+    _period("10001", [3], "16:00", "17:50", "lab"),
+    _period("10002", [2, 5], "08:00", "09:50"),
+    _period("10003", [1, 3, 4], "12:00", "12:50"),
+    # 10004 has no scheduled periods
+    _period("10004", [], None, None),
+]
+
+
+def _search(**search):
+    index = SemesterIndex(SECTIONS, PERIODS)
+    return [SECTIONS[i]["crn"] for i in index.filter(**search)]
+
+
+def test_bitmask():
+    assert bitmask([]) == 0
+    assert bitmask([0, 2]) == 0b101
+
+
+def test_filter():
+    assert _search() == ["10001", "10002", "10003", "10004"]
+    assert _search(course_subject_prefix="MATH") == ["10003", "10004"]
+    assert _search(course_subject_prefix="PHYS") == []
+    assert _search(course_number="1100") == ["10001", "10002"]
+    assert _search(course_title="calc") == ["10003"]
+    assert _search(has_seats=True) == ["10001", "10003", "10004"]
+    assert _search(has_seats=False) == ["10002"]
+    assert _search(credits=3) == ["10003", "10004"]
+    assert _search(credits=99) == []
+    assert _search(period_type="lab") == ["10001"]
+
+
+def test_filter_meeting_times():
+    # Sections must meet only on the given days and within the time window, unscheduled ones always match
+    assert _search(days=[1, 3, 4]) == ["10001", "10003", "10004"]
+    assert _search(days=[1, 4]) == ["10004"]
+    assert _search(start_time="10:00") == ["10001", "10003", "10004"]
+    assert _search(end_time="13:00") == ["10002", "10003", "10004"]
+    assert _search(days=[1, 3, 4], start_time="10:00", end_time="13:00", has_seats=True) == ["10003", "10004"]
+
+
+def test_search_builds_page():
+    index = SemesterIndex(SECTIONS, PERIODS)
+    sections = index.search(1, 1, course_subject_prefix="MATH")
+    assert [section.crn for section in sections] == ["10004"]
+    assert sections[0].periods[0].days == []
+
+    # The index's records are shared by every search
+    assert all("periods" not in record for record in index.section_records)
+
+
+class FakeCursor:
+    """Answers the index's queries from `imports` (semester_id -> import_id) and the test sections."""
+
+    def __init__(self, imports, queries):
+        self.imports = imports
+        self.queries = queries
+
+    def execute(self, query, params):
+        self.queries.append(query)
+        self.query, self.semester_id = query, params[0]
+
+    def fetchone(self):
+        return {"import_id": self.imports.get(self.semester_id)}
+
+    def fetchall(self):
+        if self.semester_id not in self.imports:
+            return []
+        return SECTIONS if "course_sections " in self.query else PERIODS
+
+
+class FakeConnection:
+    def __init__(self, imports):
+        self.imports = imports
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self.imports, self.queries)
+
+
+@pytest.fixture
+def index_cache(monkeypatch):
+    monkeypatch.setattr(section_index, "_indexes", section_index.OrderedDict())
+    monkeypatch.setattr(section_index, "SECTION_INDEX_TTL", 0)
+    monkeypatch.setattr(section_index, "SECTION_INDEX_SEMESTERS", 2)
+    return section_index._indexes
+
+
+def test_unknown_semesters_are_not_cached(index_cache):
+    conn = FakeConnection({})
+    assert get_semester_index(conn, "not-a-semester") is None
+    assert len(conn.queries) == 1
+    assert len(index_cache) == 0
+
+
+def test_index_cache_keeps_recently_searched_semesters(index_cache):
+    conn = FakeConnection({"202101": 1, "202105": 2, "202109": 3})
+    first = get_semester_index(conn, "202101")
+    get_semester_index(conn, "202105")
+
+    # Reused while the semester isn't imported again
+    assert get_semester_index(conn, "202101") is first
+
+    # The least recently searched semester makes room
+    get_semester_index(conn, "202109")
+    assert list(index_cache) == ["202101", "202109"]
+
+    # And is rebuilt after a new import
+    conn.imports["202101"] = 4
+    assert get_semester_index(conn, "202101") is not first
@@ -1,3 +1,4 @@
+import io
 import os
 from dotenv import load_dotenv, find_dotenv
 
@@ -37,3 +38,33 @@ def test_fetch_course_sections():
     assert sis.login()
     r = sis.fetch_course_sections("202101")
     assert len(r)
+
+
+def _section_row(crn="", subject="", crse="", section="", credits="", title="", days="", time="", cap="", actual="", instructor="", location=""):
+    values = [""] * 23
+    values[1:14] = [crn, subject, crse, section, "Troy", credits,
+                    title, days, time, cap, actual, "0" if crn else "", "0" if crn else ""]
+    values[19], values[21] = instructor, location
+    return "<tr>" + "".join(f"<td>{value}</td>" for value in values) + "</tr>"
+
+
+def test_iter_course_sections():
+    page = (
+        "<html><body><table><caption>Other</caption><tr><td>ignored</td></tr></table>"
+        "<table><caption>Sections Found</caption><tr><th>Select</th></tr><tr><th>CRN</th></tr>"
+        + _section_row("42608", "BIOL", "1010", "01", "4.000", "INTRODUCTION TO BIOLOGY", "MR",
+                       "02:00 pm-03:50 pm", "150", "148", "Hanna (P), Shablovsky", "SAGE 114")
+        + _section_row(days="W", time="12:20 pm-01:10 pm", location="SAGE 3303")
+        + _section_row("42609", "BIOL", "1010", "02", "1.000-4.000", "INTRODUCTION TO BIOLOGY", "T",
+                       "10:00 am-11:50 am", "30", "12", "Hanna", "LOW 4050")
+        + "</table></body></html>"
+    ).encode()
+
+    sections = list(SIS._iter_course_sections("202101", io.BytesIO(page), {}))
+    assert [section.crn for section in sections] == ["42608", "42609"]
+    assert sections[0].course_title == "INTRODUCTION TO BIOLOGY"
+    assert [period.days for period in sections[0].periods] == [[1, 4], [3]]
+    assert sections[0].periods[0].instructors == ["Hanna", "Shablovsky"]
+    assert sections[0].periods[1].start_time == "12:20"
+    assert sections[1].credits == [1, 2, 3, 4]
+    assert sections[1].enrollments == 12
@@ -1,6 +1,27 @@
-from api.parser.utils import sanitize
+import pytest
+
+from api.parser.utils import minutes_to_time, prefetch, sanitize, time_to_minutes
 
 def test_sanitize():
     assert sanitize("hello world") == "hello world"
     assert sanitize("   hello    world ") == "hello world"
-    assert sanitize("  \thello\nworld ") == "hello world"
\ No newline at end of file
+    assert sanitize("  \thello\nworld ") == "hello world"
+
+def test_time_minutes():
+    assert time_to_minutes("00:00") == 0
+    assert time_to_minutes("14:05") == 845
+    assert minutes_to_time(845) == "14:05"
+    assert minutes_to_time(time_to_minutes("09:50")) == "09:50"
+
+
+def test_prefetch():
+    assert list(prefetch(range(100), 3)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise ValueError("parse failed")
+
+    items = prefetch(failing(), 3)
+    assert next(items) == 1
+    with pytest.raises(ValueError):
+        next(items)